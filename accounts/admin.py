@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import SEARCH_VAR
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 
-from .models import ActiveSession, RecoverySession, User
+from .deletion import schedule_account_deletion
+from .models import AccountDeletionJob, ActiveSession, AuthEvent, RecoverySession, User
+from .search import clean_term, match_users, rank_users
+from .tasks import delete_account
 
 
 @admin.register(User)
@@ -82,6 +87,46 @@ class UserAdmin(DjangoUserAdmin):
     )
     search_fields = ("username", "xmpp_address", "telegram_username")
     ordering = ("username",)
+    actions = ("schedule_deletion",)
+
+    def get_queryset(self, request):
+        term = clean_term(request.GET.get(SEARCH_VAR, ""))
+        if not term:
+            return super().get_queryset(request)
+        # The rank has to exist before get_ordering() sorts by it.
+        return rank_users(term, self.model._default_manager.get_queryset()).order_by(*self.get_ordering(request))
+
+    def get_ordering(self, request):
+        if clean_term(request.GET.get(SEARCH_VAR, "")):
+            return ("-search_rank", "username")
+        return super().get_ordering(request)
+
+    def get_search_results(self, request, queryset, search_term):
+        # search_fields keeps the search box; matching goes through the trigram indexes.
+        term = clean_term(search_term)
+        if not term:
+            return queryset, False
+        return match_users(term, queryset), False
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # The stock action cascades through every related table in one request.
+        actions.pop("delete_selected", None)
+        return actions
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description=_("Delete and anonymize selected users"), permissions=["change"])
+    def schedule_deletion(self, request, queryset):
+        for user in queryset:
+            job = schedule_account_deletion(user, requested_by=request.user)
+            transaction.on_commit(lambda job_id=job.pk: delete_account.delay(job_id))
+        self.message_user(
+            request,
+            _("Scheduled deletion of %(count)d users.") % {"count": queryset.count()},
+            messages.SUCCESS,
+        )
 
 
 @admin.register(ActiveSession)
@@ -102,3 +147,43 @@ class RecoverySessionAdmin(admin.ModelAdmin):
     )
     list_filter = ("status", "channel_used", "created_at")
     search_fields = ("user__username",)
+
+
+@admin.register(AccountDeletionJob)
+class AccountDeletionJobAdmin(admin.ModelAdmin):
+    list_display = ("user", "status", "stage", "requested_by", "created_at", "completed_at")
+    list_filter = ("status",)
+    search_fields = ("user__username",)
+    readonly_fields = (
+        "user",
+        "requested_by",
+        "status",
+        "stage",
+        "progress",
+        "error",
+        "created_at",
+        "updated_at",
+        "completed_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(AuthEvent)
+class AuthEventAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "kind", "username", "ip_address")
+    list_filter = ("kind",)
+    search_fields = ("username", "ip_address")
+    date_hierarchy = "created_at"
+    # Counting a large append-only table is the slow part of the changelist.
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
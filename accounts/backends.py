@@ -0,0 +1,87 @@
+"""Authentication backends for the accounts domain."""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from functools import lru_cache
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import router
+
+from .models import User
+
+
+USER_VERSION_KEY = "accounts:user-version:{}"
+USER_CACHE_KEY = "accounts:user:{}:v{}:{}"
+
+# Recovery material never leaves the database; everything else, including the
+# password hash needed for session verification, is cached.
+CACHED_USER_EXCLUDED_FIELDS = (
+    "mnemonic_salt",
+    "mnemonic_hash",
+    "mnemonic_hint",
+    "mnemonic_created_at",
+)
+
+
+@lru_cache(maxsize=1)
+def _cached_field_names() -> tuple[str, ...]:
+    return tuple(
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.name not in CACHED_USER_EXCLUDED_FIELDS
+    )
+
+
+@lru_cache(maxsize=1)
+def _schema_tag() -> str:
+    # Entries are positional, so a deploy that changes the field list must miss.
+    return hashlib.sha256(",".join(_cached_field_names()).encode()).hexdigest()[:8]
+
+
+def get_user_version(user_id: int) -> int:
+    key = USER_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter cannot resurrect an old entry.
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_cached_users(user_ids: Iterable[int]) -> None:
+    """Bump the version of each user so cached copies are ignored immediately."""
+
+    for user_id in user_ids:
+        key = USER_VERSION_KEY.format(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns() // 1000, timeout=None)
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` whose per-request user lookup is served from the cache."""
+
+    def get_user(self, user_id):
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+
+        key = USER_CACHE_KEY.format(user_id, get_user_version(user_id), _schema_tag())
+        field_names = _cached_field_names()
+        values = cache.get(key)
+        if values is None:
+            user = User._default_manager.only(*field_names).filter(pk=user_id).first()
+            if user is None:
+                return None
+            cache.set(key, [getattr(user, name) for name in field_names], timeout=settings.USER_CACHE_TIMEOUT)
+        else:
+            user = User.from_db(router.db_for_read(User), field_names, values)
+
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,77 @@
+"""Stateless recovery challenges.
+
+After the mnemonic step the server keeps only an HMAC of the one-time code,
+in the cache under a random challenge id that expires with the OTP. The
+browser receives the challenge id in a signed, timestamped token, so the
+OTP step needs neither a session write nor a database read until the
+password is actually reset. Deleting the cache entry consumes the
+challenge, which makes every code single-use.
+"""
+
+from __future__ import annotations
+
+import secrets
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+
+CHALLENGE_KEY = "accounts:recovery-challenge:{}"
+CHALLENGE_COOKIE = "recovery_challenge"
+SIGNING_SALT = "accounts.recovery-challenge"
+HMAC_SALT = "accounts.recovery-challenge.otp"
+
+
+@dataclass(frozen=True)
+class PendingChallenge:
+    challenge_id: str
+    user_id: int
+    recovery_session_id: int
+    otp_digest: str
+
+    def check_otp(self, otp_code: str) -> bool:
+        return constant_time_compare(_otp_digest(self.challenge_id, otp_code), self.otp_digest)
+
+
+def _otp_digest(challenge_id: str, otp_code: str) -> str:
+    return salted_hmac(HMAC_SALT, f"{challenge_id}:{otp_code}", algorithm="sha256").hexdigest()
+
+
+def issue_challenge(user_id: int, recovery_session_id: int, otp_code: str) -> str:
+    """Store a hashed OTP and return the signed token identifying it."""
+
+    challenge_id = secrets.token_urlsafe(16)
+    cache.set(
+        CHALLENGE_KEY.format(challenge_id),
+        {
+            "user_id": user_id,
+            "recovery_session_id": recovery_session_id,
+            "otp_digest": _otp_digest(challenge_id, otp_code),
+        },
+        timeout=settings.RECOVERY_CHALLENGE_TTL,
+    )
+    return signing.dumps(challenge_id, salt=SIGNING_SALT, compress=False)
+
+
+def load_challenge(token: str | None) -> PendingChallenge | None:
+    """Return the challenge behind ``token`` if the signature is valid and it has not expired."""
+
+    if not token:
+        return None
+    try:
+        challenge_id = signing.loads(token, salt=SIGNING_SALT, max_age=settings.RECOVERY_CHALLENGE_TTL)
+    except signing.BadSignature:
+        return None
+    state = cache.get(CHALLENGE_KEY.format(challenge_id))
+    if state is None:
+        return None
+    return PendingChallenge(challenge_id=challenge_id, **state)
+
+
+def consume_challenge(challenge: PendingChallenge) -> bool:
+    """Delete the challenge; only the first caller gets ``True``."""
+
+    return cache.delete(CHALLENGE_KEY.format(challenge.challenge_id))
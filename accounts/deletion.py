@@ -0,0 +1,202 @@
+"""Chunked deletion and anonymization of user accounts.
+
+Deleting a ``User`` through the ORM collects every dependent row in Python
+and removes them in one long transaction. Instead an ``AccountDeletionJob``
+walks the personal-data tables one bounded primary-key chunk at a time and
+records its stage and counts in the same transaction as each chunk, so a
+killed worker resumes where it stopped. Authentication events are scrubbed
+of identifying fields rather than deleted, so the security log stays
+complete. The user row itself is anonymized rather than deleted: wallet
+accounts, ledger entries and membership invoices keep pointing at it and
+stay intact.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Callable
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import models, transaction
+from django.utils import timezone
+
+from notifications.models import NotificationLog, NotificationPreference
+from notifications.preferences import invalidate_channel_map
+from support.models import SupportTicket, TicketAttachment, TicketMessage
+
+from .backends import invalidate_cached_users
+from .models import AccountDeletionJob, ActiveSession, AuthEvent, RecoverySession, User
+from .revocation import revoke_sessions
+from .session_backend import SessionStore
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DeletionStage:
+    name: str
+    queryset: Callable[[int], models.QuerySet]
+    before_delete: Callable[[list], None] | None = None
+    # Rows are scrubbed with these values instead of deleted. The values must
+    # take the rows out of ``queryset`` so the next chunk moves on.
+    scrub: dict | None = None
+
+
+def _end_sessions(sessions: list[ActiveSession]) -> None:
+    keys = [session.session_key for session in sessions]
+    revoke_sessions(keys)
+    for key in keys:
+        SessionStore(session_key=key).delete()
+
+
+def _delete_attachment_files(attachments: list[TicketAttachment]) -> None:
+    names = [(attachment.file.storage, attachment.file.name) for attachment in attachments if attachment.file]
+    # Files cannot be rolled back, so only remove them once the rows are gone.
+    transaction.on_commit(lambda: [storage.delete(name) for storage, name in names])
+
+
+DELETION_STAGES: tuple[DeletionStage, ...] = (
+    DeletionStage(
+        "sessions",
+        lambda user_id: ActiveSession.objects.filter(user_id=user_id),
+        before_delete=_end_sessions,
+    ),
+    DeletionStage("recovery_sessions", lambda user_id: RecoverySession.objects.filter(user_id=user_id)),
+    # The security log outlives the account; only what identifies the person goes.
+    DeletionStage(
+        "auth_events",
+        lambda user_id: AuthEvent.objects.filter(
+            models.Q(user_id=user_id) | models.Q(username__in=User.objects.filter(pk=user_id).values("username"))
+        ),
+        scrub={"user": None, "username": "", "ip_address": None, "user_agent": ""},
+    ),
+    DeletionStage("notification_logs", lambda user_id: NotificationLog.objects.filter(user_id=user_id)),
+    DeletionStage(
+        "notification_preferences", lambda user_id: NotificationPreference.objects.filter(user_id=user_id)
+    ),
+    DeletionStage(
+        "ticket_attachments",
+        lambda user_id: TicketAttachment.objects.filter(message__ticket__user_id=user_id),
+        before_delete=_delete_attachment_files,
+    ),
+    DeletionStage("ticket_messages", lambda user_id: TicketMessage.objects.filter(ticket__user_id=user_id)),
+    DeletionStage("tickets", lambda user_id: SupportTicket.objects.filter(user_id=user_id)),
+    DeletionStage("groups", lambda user_id: User.groups.through.objects.filter(user_id=user_id)),
+    DeletionStage("permissions", lambda user_id: User.user_permissions.through.objects.filter(user_id=user_id)),
+)
+STAGE_NAMES = [stage.name for stage in DELETION_STAGES] + ["anonymize"]
+
+
+def schedule_account_deletion(user: User, requested_by: User | None = None) -> AccountDeletionJob:
+    """Lock the account out immediately and queue its data for removal.
+
+    An unfinished job for the same user is reused; a failed one resumes from
+    its last checkpoint.
+    """
+
+    with transaction.atomic():
+        job = (
+            AccountDeletionJob.objects.select_for_update()
+            .filter(user=user)
+            .exclude(status=AccountDeletionJob.Status.COMPLETED)
+            .first()
+        )
+        if job is None:
+            job = AccountDeletionJob.objects.create(user=user, requested_by=requested_by, stage=STAGE_NAMES[0])
+        elif job.status == AccountDeletionJob.Status.FAILED:
+            job.status = AccountDeletionJob.Status.PENDING
+            job.error = ""
+            job.save(update_fields=["status", "error", "updated_at"])
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        transaction.on_commit(lambda: invalidate_cached_users([user.pk]))
+    return job
+
+
+def anonymize_user(user_id: int) -> None:
+    User.objects.filter(pk=user_id).update(
+        username=f"deleted-{user_id}",
+        password=make_password(None),
+        first_name="",
+        last_name="",
+        email="",
+        xmpp_address="",
+        jabber_verified=False,
+        telegram_username="",
+        telegram_chat_id="",
+        telegram_verified=False,
+        mnemonic_salt=None,
+        mnemonic_hash="",
+        mnemonic_hint="",
+        mnemonic_created_at=None,
+        is_active=False,
+        is_staff=False,
+        is_superuser=False,
+    )
+
+
+def _run_chunk(job_id: int, batch_size: int) -> bool:
+    """Process one chunk of the job's current stage; returns False when the job is done."""
+
+    with transaction.atomic():
+        job = AccountDeletionJob.objects.select_for_update().get(pk=job_id)
+        if job.status in (AccountDeletionJob.Status.COMPLETED, AccountDeletionJob.Status.FAILED):
+            return False
+
+        stage_name = job.stage or STAGE_NAMES[0]
+        job.status = AccountDeletionJob.Status.RUNNING
+        fields = ["status", "stage", "progress", "updated_at"]
+
+        if stage_name == "anonymize":
+            anonymize_user(job.user_id)
+            job.status = AccountDeletionJob.Status.COMPLETED
+            job.completed_at = timezone.now()
+            job.save(update_fields=fields + ["completed_at"])
+            user_id = job.user_id
+            transaction.on_commit(lambda: (invalidate_cached_users([user_id]), invalidate_channel_map(user_id)))
+            return False
+
+        stage = DELETION_STAGES[STAGE_NAMES.index(stage_name)]
+        queryset = stage.queryset(job.user_id).order_by("pk")
+        if stage.before_delete is not None:
+            chunk = list(queryset[:batch_size])
+            pks = [row.pk for row in chunk]
+            stage.before_delete(chunk)
+        else:
+            pks = list(queryset.values_list("pk", flat=True)[:batch_size])
+
+        if pks:
+            chunk_rows = queryset.model._base_manager.filter(pk__in=pks)
+            if stage.scrub is not None:
+                chunk_rows.update(**stage.scrub)
+            else:
+                # The chunk is bounded, so even the collector's fallback path stays small.
+                chunk_rows.delete()
+            job.progress[stage_name] = job.progress.get(stage_name, 0) + len(pks)
+        if len(pks) < batch_size:
+            job.stage = STAGE_NAMES[STAGE_NAMES.index(stage_name) + 1]
+        else:
+            job.stage = stage_name
+        job.save(update_fields=fields)
+        return True
+
+
+def run_account_deletion(job_id: int, batch_size: int | None = None, max_chunks: int | None = None) -> bool:
+    """Advance a deletion job; returns ``True`` once it has completed."""
+
+    batch_size = batch_size or settings.ACCOUNT_DELETION_BATCH_SIZE
+    chunks = 0
+    try:
+        while max_chunks is None or chunks < max_chunks:
+            if not _run_chunk(job_id, batch_size):
+                break
+            chunks += 1
+    except Exception as exc:
+        logger.exception("Account deletion job %s failed", job_id)
+        AccountDeletionJob.objects.filter(pk=job_id).update(
+            status=AccountDeletionJob.Status.FAILED, error=str(exc), updated_at=timezone.now()
+        )
+        raise
+    return AccountDeletionJob.objects.filter(pk=job_id, status=AccountDeletionJob.Status.COMPLETED).exists()
@@ -0,0 +1,128 @@
+"""Buffered writer for the authentication event log.
+
+Events are appended to a per-process queue on the request path and written
+with ``bulk_create`` once the queue reaches ``AUTH_EVENT_BATCH_SIZE`` or the
+oldest event is ``AUTH_EVENT_FLUSH_INTERVAL`` seconds old. The age check
+runs on ``request_finished`` (see ``signals``), after the response has
+gone out. That is after Django has released the request's database
+connection, so the handler releases the one a flush reopens. The queue is
+drained at interpreter exit so a clean shutdown loses nothing. Events of a
+user deleted before the flush are written without the user link.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+
+from .models import AuthEvent, User
+from .utils import get_client_ip, get_user_agent
+
+
+logger = logging.getLogger(__name__)
+
+
+class AuthEventQueue:
+    """Thread-safe in-process queue of unsaved ``AuthEvent`` rows."""
+
+    def __init__(self, batch_size: int | None = None, flush_interval: float | None = None):
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._events: deque[AuthEvent] = deque()
+        self._oldest: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size or settings.AUTH_EVENT_BATCH_SIZE
+
+    @property
+    def flush_interval(self) -> float:
+        return settings.AUTH_EVENT_FLUSH_INTERVAL if self._flush_interval is None else self._flush_interval
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def record(
+        self, kind: str, request=None, user=None, username: str = "", user_id: int | None = None, **metadata
+    ) -> None:
+        if user is not None and not getattr(user, "is_authenticated", False):
+            user = None
+        event = AuthEvent(
+            kind=kind,
+            user_id=user.pk if user is not None else user_id,
+            username=(user.get_username() if user is not None else username or "")[:150],
+            ip_address=get_client_ip(request) if request is not None else None,
+            user_agent=get_user_agent(request) if request is not None else "",
+            metadata=metadata,
+        )
+        with self._lock:
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._events.append(event)
+            full = len(self._events) >= self.batch_size
+        if full:
+            self.flush()
+
+    def is_due(self) -> bool:
+        oldest = self._oldest
+        return oldest is not None and time.monotonic() - oldest >= self.flush_interval
+
+    def flush_if_due(self) -> int:
+        return self.flush() if self.is_due() else 0
+
+    def flush(self) -> int:
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            self._oldest = None
+        if not events:
+            return 0
+        try:
+            self._write(events)
+        except DatabaseError:
+            # Auth must not fail because the audit trail is unavailable.
+            logger.exception("Dropped %s authentication events", len(events))
+            return 0
+        return len(events)
+
+    def _write(self, events: list[AuthEvent]) -> None:
+        try:
+            with transaction.atomic():
+                AuthEvent.objects.bulk_create(events, batch_size=self.batch_size)
+        except IntegrityError:
+            # A user deleted while their events were queued fails the whole
+            # batch; keep the events with the username alone, as SET_NULL would.
+            user_ids = {event.user_id for event in events if event.user_id is not None}
+            existing = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+            for event in events:
+                event.pk = None
+                if event.user_id not in existing:
+                    event.user_id = None
+            with transaction.atomic():
+                AuthEvent.objects.bulk_create(events, batch_size=self.batch_size)
+
+    def clear(self) -> None:
+        """Drop queued events without writing them."""
+
+        with self._lock:
+            self._events.clear()
+            self._oldest = None
+
+
+auth_events = AuthEventQueue()
+
+
+def record_auth_event(
+    kind: str, request=None, user=None, username: str = "", user_id: int | None = None, **metadata
+) -> None:
+    auth_events.record(kind, request=request, user=user, username=username, user_id=user_id, **metadata)
+
+
+atexit.register(auth_events.flush)
@@ -5,6 +5,7 @@ from __future__ import annotations
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 
+from .mnemonic import bip39_checksum_validator
 from .models import User, mnemonic_validator
 
 
@@ -47,8 +48,9 @@ class MnemonicResetForm(forms.Form):
     mnemonic_phrase = forms.CharField(widget=forms.Textarea(attrs={"rows": 3}))
 
     def clean_mnemonic_phrase(self):
-        phrase = self.cleaned_data.get("mnemonic_phrase", "").strip()
+        phrase = " ".join(self.cleaned_data.get("mnemonic_phrase", "").lower().split())
         mnemonic_validator(phrase)
+        bip39_checksum_validator(phrase)
         return phrase
 
 
@@ -64,3 +66,9 @@ class ProfileUpdateForm(forms.ModelForm):
             "requires_mfa",
         )
 
+    def save(self, commit: bool = True):  # type: ignore[override]
+        # A new handle must be resolved again before Telegram messages go out.
+        if "telegram_username" in self.changed_data:
+            self.instance.telegram_chat_id = ""
+            self.instance.telegram_verified = False
+        return super().save(commit=commit)
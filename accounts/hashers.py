@@ -0,0 +1,32 @@
+"""Password hashers for the accounts domain."""
+
+from __future__ import annotations
+
+from django.conf import settings
+from django.contrib.auth.hashers import ScryptPasswordHasher
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """Django's scrypt hasher with cost parameters read from settings.
+
+    It keeps the ``scrypt`` algorithm name, so hashes made by the stock hasher
+    still verify. ``must_update`` compares against these settings, and Django
+    then re-encodes a stored hash on the next successful login whenever the
+    tuning changes or the hash came from an older hasher such as PBKDF2.
+    """
+
+    @property
+    def work_factor(self) -> int:
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self) -> int:
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self) -> int:
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+    @property
+    def maxmem(self) -> int:
+        return settings.PASSWORD_SCRYPT_MAXMEM
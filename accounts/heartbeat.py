@@ -0,0 +1,103 @@
+"""Write-behind buffer for ``ActiveSession.last_seen``.
+
+Requests record activity into a shared buffer (a Redis hash in deployment)
+at most once per ``SESSION_HEARTBEAT_INTERVAL`` per session and process; the
+``accounts.flush_session_heartbeats`` task drains it into ``ActiveSession``
+with one bulk UPDATE per batch. The same heartbeat refreshes the session
+index kept by ``accounts.session_backend``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.db.models.functions import Greatest
+
+from config.redis import get_redis_client
+
+from .models import ActiveSession
+from .session_backend import session_index
+
+
+HEARTBEAT_BUFFER_KEY = "accounts:session-heartbeats"
+
+
+class HeartbeatBuffer:
+    """Coalesces session activity before it reaches the database."""
+
+    max_tracked = 10000
+
+    def __init__(self, interval: int | None = None):
+        self.interval = settings.SESSION_HEARTBEAT_INTERVAL if interval is None else interval
+        self._recent: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, session_key: str, seen_at: datetime) -> bool:
+        """Buffer a heartbeat, returning ``False`` when it was coalesced locally."""
+
+        now = time.monotonic()
+        with self._lock:
+            last = self._recent.get(session_key)
+            if last is not None and now - last < self.interval:
+                return False
+            self._recent[session_key] = now
+            self._recent.move_to_end(session_key)
+            while len(self._recent) > self.max_tracked:
+                self._recent.popitem(last=False)
+
+        timestamp = seen_at.timestamp()
+        client = get_redis_client()
+        if client is not None:
+            client.hset(cache.make_key(HEARTBEAT_BUFFER_KEY), session_key, timestamp)
+        else:
+            # Non-Redis caches have no hash type; a read-modify-write may drop a
+            # concurrent heartbeat, which the next interval makes up for.
+            pending = cache.get(HEARTBEAT_BUFFER_KEY) or {}
+            pending[session_key] = max(timestamp, pending.get(session_key, 0))
+            cache.set(HEARTBEAT_BUFFER_KEY, pending, timeout=None)
+        session_index.touch(session_key, seen_at)
+        return True
+
+    def drain(self) -> dict[str, datetime]:
+        client = get_redis_client()
+        if client is not None:
+            key = cache.make_key(HEARTBEAT_BUFFER_KEY)
+            pipeline = client.pipeline(transaction=True)
+            pipeline.hgetall(key)
+            pipeline.delete(key)
+            raw, _ = pipeline.execute()
+            pending = {field.decode(): float(value) for field, value in raw.items()}
+        else:
+            pending = cache.get(HEARTBEAT_BUFFER_KEY) or {}
+            cache.delete(HEARTBEAT_BUFFER_KEY)
+        return {
+            session_key: datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+            for session_key, timestamp in pending.items()
+        }
+
+
+heartbeat_buffer = HeartbeatBuffer()
+
+
+def flush_heartbeats(buffer: HeartbeatBuffer | None = None, batch_size: int = 500) -> int:
+    """Apply buffered heartbeats to ``ActiveSession``; returns the rows updated."""
+
+    pending = (buffer or heartbeat_buffer).drain()
+    session_keys = list(pending)
+    updated = 0
+    for start in range(0, len(session_keys), batch_size):
+        batch = session_keys[start : start + batch_size]
+        seen = Case(
+            *[When(session_key=key, then=Value(pending[key])) for key in batch],
+            output_field=DateTimeField(),
+        )
+        updated += ActiveSession.objects.filter(session_key__in=batch, is_active=True).update(
+            last_seen=Greatest(F("last_seen"), seen)
+        )
+    return updated
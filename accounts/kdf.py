@@ -0,0 +1,163 @@
+"""Bounded process pool for mnemonic key derivation.
+
+Key derivation over a recovery phrase is deliberately expensive. Running it inline
+pins a web worker for the full derivation, so the work is shipped to a small
+process pool instead. The pool is sized to the host's cores and refuses new
+work once ``max_pending`` derivations are queued, letting callers fail fast
+instead of piling up behind a burst of recovery attempts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class KDFPoolOverloaded(RuntimeError):
+    """Raised when the derivation queue is full and new work is rejected."""
+
+
+class UnknownKDFAlgorithm(ValueError):
+    """Raised for an algorithm name the derivation workers do not implement."""
+
+
+@dataclass(frozen=True)
+class KDFResult:
+    digest: bytes
+    queue_wait: float
+    compute_time: float
+
+
+KDF_ALGORITHMS = ("pbkdf2_sha3_256", "scrypt")
+
+
+def derive_key(algorithm: str, password: bytes, salt: bytes, params: dict[str, int]) -> bytes:
+    if algorithm == "pbkdf2_sha3_256":
+        return hashlib.pbkdf2_hmac("sha3-256", password, salt, params["iterations"])
+    if algorithm == "scrypt":
+        n, r, p = params["n"], params["r"], params["p"]
+        # hashlib's default 32 MiB ceiling is below the cost of the larger tunings.
+        maxmem = 128 * r * (n + p + 2) + 1024 * 1024
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=32)
+    raise UnknownKDFAlgorithm(algorithm)
+
+
+def _timed_derive(algorithm: str, password: bytes, salt: bytes, params: dict[str, int]) -> tuple[bytes, float]:
+    started = time.perf_counter()
+    digest = derive_key(algorithm, password, salt, params)
+    return digest, time.perf_counter() - started
+
+
+class KDFPool:
+    """Process pool with a hard cap on queued derivations."""
+
+    def __init__(self, max_workers: int | None = None, max_pending: int | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending if max_pending is not None else self.max_workers * 4
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._pid: int | None = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, algorithm: str, password: bytes, salt: bytes, params: dict[str, int]) -> Future:
+        if algorithm not in KDF_ALGORITHMS:
+            raise UnknownKDFAlgorithm(algorithm)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise KDFPoolOverloaded(f"KDF queue full ({self._pending}/{self.max_pending} pending)")
+            self._pending += 1
+            executor = self._get_executor()
+
+        submitted_at = time.perf_counter()
+        try:
+            inner = executor.submit(_timed_derive, algorithm, password, salt, dict(params))
+        except BaseException:
+            self._release(broken=executor)
+            raise
+
+        outer: Future = Future()
+
+        def _complete(done: Future) -> None:
+            try:
+                digest, compute_time = done.result()
+            except BrokenProcessPool as exc:
+                self._release(broken=executor)
+                outer.set_exception(exc)
+                return
+            except BaseException as exc:
+                self._release()
+                outer.set_exception(exc)
+                return
+            self._release()
+            queue_wait = max(0.0, time.perf_counter() - submitted_at - compute_time)
+            logger.debug(
+                "KDF %s derivation queue_wait=%.4fs compute=%.4fs", algorithm, queue_wait, compute_time
+            )
+            outer.set_result(KDFResult(digest=digest, queue_wait=queue_wait, compute_time=compute_time))
+
+        inner.add_done_callback(_complete)
+        return outer
+
+    def derive(self, algorithm: str, password: bytes, salt: bytes, params: dict[str, int]) -> KDFResult:
+        return self.submit(algorithm, password, salt, params).result()
+
+    async def aderive(self, algorithm: str, password: bytes, salt: bytes, params: dict[str, int]) -> KDFResult:
+        return await asyncio.wrap_future(self.submit(algorithm, password, salt, params))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            self._pid = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Pools do not survive a fork, so a pre-forked web worker gets its own.
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._pid = pid
+        return self._executor
+
+    def _release(self, broken: ProcessPoolExecutor | None = None) -> None:
+        with self._lock:
+            self._pending -= 1
+            # Only drop the pool that failed; another caller may already have replaced it.
+            if broken is not None and broken is self._executor:
+                self._executor = None
+                self._pid = None
+        if broken is not None:
+            # Stops the broken pool's manager thread and closes its pipes.
+            broken.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: KDFPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_kdf_pool() -> KDFPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = KDFPool(
+                    max_workers=settings.MNEMONIC_KDF_WORKERS or None,
+                    max_pending=settings.MNEMONIC_KDF_MAX_PENDING or None,
+                )
+    return _pool
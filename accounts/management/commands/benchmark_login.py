@@ -0,0 +1,77 @@
+"""Benchmark password verification cost for the configured hasher."""
+
+from __future__ import annotations
+
+import statistics
+import time
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import check_password, get_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = "Report p50/p99 login latency and sustainable logins per second per worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50, help="Timed logins to run.")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed logins before measuring.")
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Time authenticate() against a throwaway user instead of bare password checks.",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        if iterations < 1:
+            raise CommandError("--iterations must be at least 1")
+
+        hasher = get_hasher()
+        password = "benchmark-login-password"
+        encoded = make_password(password)
+
+        if options["full"]:
+            timings = self._time_authenticate(password, iterations, options["warmup"])
+        else:
+            for _ in range(options["warmup"]):
+                check_password(password, encoded)
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                check_password(password, encoded)
+                timings.append(time.perf_counter() - started)
+
+        timings.sort()
+        p50 = statistics.median(timings)
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        mean = statistics.fmean(timings)
+
+        summary = ", ".join(
+            f"{key}={value}"
+            for key, value in hasher.safe_summary(encoded).items()
+            if key not in {"algorithm", "salt", "hash"}
+        )
+        self.stdout.write(f"hasher: {hasher.algorithm} ({summary})")
+        if hasher.algorithm == "scrypt":
+            memory = 128 * hasher.block_size * hasher.work_factor / (1024 * 1024)
+            self.stdout.write(f"memory per login: {memory:.0f} MiB")
+        self.stdout.write(f"samples: {len(timings)}")
+        self.stdout.write(f"p50: {p50 * 1000:.1f} ms")
+        self.stdout.write(f"p99: {p99 * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"max sustainable logins/s per worker: {1 / mean:.1f}"))
+
+    def _time_authenticate(self, password: str, iterations: int, warmup: int) -> list[float]:
+        User = get_user_model()
+        timings = []
+        with transaction.atomic():
+            user = User.objects.create_user(username="__benchmark_login__", password=password)
+            for index in range(warmup + iterations):
+                started = time.perf_counter()
+                if authenticate(username=user.username, password=password) is None:
+                    raise CommandError("Benchmark user failed to authenticate")
+                if index >= warmup:
+                    timings.append(time.perf_counter() - started)
+            transaction.set_rollback(True)
+        return timings
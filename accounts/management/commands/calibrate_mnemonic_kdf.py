@@ -0,0 +1,83 @@
+"""Calibrate mnemonic KDF parameters to a target latency on this host."""
+
+from __future__ import annotations
+
+import secrets
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.kdf import KDF_ALGORITHMS, derive_key
+
+
+class Command(BaseCommand):
+    help = "Measure mnemonic KDF cost on this hardware and suggest parameters for a target latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target-ms", type=float, default=250.0, help="Desired time per derivation.")
+        parser.add_argument(
+            "--algorithm",
+            choices=[*KDF_ALGORITHMS, "all"],
+            default="all",
+            help="Algorithm to calibrate.",
+        )
+        parser.add_argument(
+            "--max-memory-mb",
+            type=int,
+            default=64,
+            help="Upper bound on scrypt memory per derivation.",
+        )
+        parser.add_argument("--samples", type=int, default=3, help="Timed runs per measurement.")
+
+    def handle(self, *args, **options):
+        target = options["target_ms"] / 1000
+        if target <= 0:
+            raise CommandError("--target-ms must be positive")
+        self.samples = max(1, options["samples"])
+
+        algorithms = KDF_ALGORITHMS if options["algorithm"] == "all" else (options["algorithm"],)
+        for algorithm in algorithms:
+            if algorithm == "pbkdf2_sha3_256":
+                self._calibrate_pbkdf2(target)
+            else:
+                self._calibrate_scrypt(target, options["max_memory_mb"] * 1024 * 1024)
+
+    def _measure(self, algorithm: str, params: dict[str, int]) -> float:
+        password = secrets.token_bytes(32)
+        salt = secrets.token_bytes(16)
+        timings = []
+        for _ in range(self.samples):
+            started = time.perf_counter()
+            derive_key(algorithm, password, salt, params)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+
+    def _calibrate_pbkdf2(self, target: float) -> None:
+        probe = 20000
+        elapsed = self._measure("pbkdf2_sha3_256", {"iterations": probe})
+        iterations = max(probe, int(probe * target / elapsed))
+        # One correction pass evens out warm-up noise in the probe run.
+        measured = self._measure("pbkdf2_sha3_256", {"iterations": iterations})
+        iterations = max(probe, int(iterations * target / measured) // 1000 * 1000)
+        measured = self._measure("pbkdf2_sha3_256", {"iterations": iterations})
+
+        self.stdout.write(f"pbkdf2_sha3_256: iterations={iterations} -> {measured * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS("  MNEMONIC_HASH_ALGORITHM=pbkdf2_sha3_256"))
+        self.stdout.write(self.style.SUCCESS(f"  MNEMONIC_PBKDF2_ITERATIONS={iterations}"))
+
+    def _calibrate_scrypt(self, target: float, max_memory: int) -> None:
+        r, p = 8, 1
+        n = 2**14
+        measured = self._measure("scrypt", {"n": n, "r": r, "p": p})
+        # Doubling n doubles both time and memory, so stop before overshooting either bound.
+        while measured * 2 <= target * 1.25 and 128 * r * n * 2 <= max_memory:
+            n *= 2
+            measured = self._measure("scrypt", {"n": n, "r": r, "p": p})
+        memory_mb = 128 * r * n / (1024 * 1024)
+
+        self.stdout.write(f"scrypt: n={n} r={r} p={p} ({memory_mb:.0f} MiB) -> {measured * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS("  MNEMONIC_HASH_ALGORITHM=scrypt"))
+        self.stdout.write(self.style.SUCCESS(f"  MNEMONIC_SCRYPT_N={n}"))
+        self.stdout.write(self.style.SUCCESS(f"  MNEMONIC_SCRYPT_R={r}"))
+        self.stdout.write(self.style.SUCCESS(f"  MNEMONIC_SCRYPT_P={p}"))
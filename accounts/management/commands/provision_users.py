@@ -0,0 +1,147 @@
+"""Bulk-create user accounts from CSV or JSONL with generated recovery phrases."""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.kdf import derive_key
+from accounts.mnemonic import SALT_BYTES, encode_mnemonic_hash
+from accounts.models import User
+from accounts.services import generate_mnemonic_phrase
+
+
+USER_FIELDS = ("first_name", "last_name", "xmpp_address", "telegram_username")
+
+
+def hash_credentials(job: tuple[str | None, str, str, dict[str, int]]) -> tuple[str, str]:
+    """Worker entry point: hash one password and one mnemonic phrase."""
+
+    password, phrase, algorithm, params = job
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = derive_key(algorithm, phrase.encode("utf-8"), salt, params)
+    return make_password(password), encode_mnemonic_hash(algorithm, params, salt, digest)
+
+
+def _read_rows(path: Path, fmt: str) -> Iterator[tuple[int, dict]]:
+    with path.open(newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            for line_number, row in enumerate(csv.DictReader(handle), start=2):
+                yield line_number, row
+            return
+        for line_number, line in enumerate(handle, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as exc:
+                    raise CommandError(f"{path}:{line_number}: invalid JSON ({exc})") from exc
+
+
+class Command(BaseCommand):
+    help = "Provision many users at once, hashing credentials across a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", type=Path, help="CSV (with header) or JSONL file of users.")
+        parser.add_argument("--output", type=Path, required=True, help="Where to write username,phrase pairs.")
+        parser.add_argument("--format", choices=["auto", "csv", "jsonl"], default="auto")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=0, help="Hashing processes (default: all cores).")
+
+    def handle(self, *args, **options):
+        path: Path = options["input"]
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+        fmt = options["format"]
+        if fmt == "auto":
+            fmt = "csv" if path.suffix.lower() == ".csv" else "jsonl"
+        batch_size = max(1, options["batch_size"])
+        workers = options["workers"] or os.cpu_count() or 1
+
+        algorithm = settings.MNEMONIC_HASH_ALGORITHM
+        params = dict(settings.MNEMONIC_HASH_PARAMS[algorithm])
+
+        created = skipped = 0
+        hashing_time = 0.0
+        started = time.perf_counter()
+        rows = _read_rows(path, fmt)
+
+        fd = os.open(options["output"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as output, ProcessPoolExecutor(
+            max_workers=workers, initializer=django.setup
+        ) as executor:
+            writer = csv.writer(output)
+            writer.writerow(["username", "mnemonic_phrase"])
+
+            while batch := list(islice(rows, batch_size)):
+                users, phrases = self._build_batch(batch)
+                skipped += len(batch) - len(users)
+                if not users:
+                    continue
+
+                jobs = [(row.get("password") or None, phrase, algorithm, params) for row, phrase in zip(users, phrases)]
+                hash_started = time.perf_counter()
+                hashes = list(executor.map(hash_credentials, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+                hashing_time += time.perf_counter() - hash_started
+
+                now = timezone.now()
+                instances = [
+                    User(
+                        username=row["username"],
+                        password=password_hash,
+                        preferred_channel=row.get("preferred_channel") or User.NotificationChannel.TELEGRAM,
+                        mnemonic_hash=mnemonic_hash,
+                        mnemonic_created_at=now,
+                        mnemonic_hint=phrase.split()[0],
+                        **{field: row.get(field) or "" for field in USER_FIELDS},
+                    )
+                    for row, phrase, (password_hash, mnemonic_hash) in zip(users, phrases, hashes)
+                ]
+                instances = User.objects.bulk_create(instances)
+                writer.writerows((user.username, phrase) for user, phrase in zip(instances, phrases))
+                created += len(instances)
+                self.stdout.write(f"  {created} users created...")
+
+        elapsed = time.perf_counter() - started
+        rate = created / elapsed if elapsed else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {created} users ({skipped} skipped) in {elapsed:.1f}s: "
+                f"{rate:.1f} users/s, {hashing_time:.1f}s hashing on {workers} workers."
+            )
+        )
+        self.stdout.write(f"Recovery phrases written to {options['output']}")
+
+    def _build_batch(self, batch: list[tuple[int, dict]]) -> tuple[list[dict], list[str]]:
+        valid_channels = set(User.NotificationChannel.values)
+        candidates: dict[str, dict] = {}
+        for line_number, row in batch:
+            username = User.normalize_username((row.get("username") or "").strip())
+            if not username:
+                raise CommandError(f"line {line_number}: username is required")
+            channel = row.get("preferred_channel")
+            if channel and channel not in valid_channels:
+                raise CommandError(f"line {line_number}: unknown preferred_channel {channel!r}")
+            if username in candidates:
+                self.stderr.write(f"line {line_number}: duplicate username {username!r} skipped")
+                continue
+            candidates[username] = {**row, "username": username}
+
+        existing = set(User.objects.filter(username__in=candidates).values_list("username", flat=True))
+        for username in sorted(existing):
+            self.stderr.write(f"username {username!r} already exists; skipped")
+
+        users = [row for username, row in candidates.items() if username not in existing]
+        return users, [generate_mnemonic_phrase() for _ in users]
@@ -0,0 +1,36 @@
+"""Middleware for the accounts domain."""
+
+from __future__ import annotations
+
+from django.utils import timezone
+
+from .heartbeat import heartbeat_buffer
+from .revocation import revocation_list
+
+
+class SessionRevocationMiddleware:
+    """Drop sessions that were terminated from another device or worker."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        session_key = request.session.session_key
+        if session_key and revocation_list.is_revoked(session_key):
+            request.session.flush()
+        return self.get_response(request)
+
+
+class SessionHeartbeatMiddleware:
+    """Record authenticated session activity without a per-request UPDATE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session_key = getattr(getattr(request, "session", None), "session_key", None)
+        user = getattr(request, "user", None)
+        if session_key and user is not None and user.is_authenticated:
+            heartbeat_buffer.record(session_key, timezone.now())
+        return response
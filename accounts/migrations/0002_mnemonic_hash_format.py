@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-16 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="mnemonic_hash",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-16 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_mnemonic_hash_format"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="activesession",
+            index=models.Index(
+                fields=["user", "is_active", "-last_seen"],
+                name="accounts_session_recent_idx",
+            ),
+        ),
+    ]
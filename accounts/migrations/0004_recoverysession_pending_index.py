@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-16 20:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_activesession_recent_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recoverysession",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["expires_at"],
+                name="accounts_recovery_pending_idx",
+            ),
+        ),
+    ]
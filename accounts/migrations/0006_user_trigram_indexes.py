@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+FIELDS = ("username", "xmpp_address", "telegram_username")
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for field in FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "accounts_user_{field}_trgm" '
+            f'ON "accounts_user" USING gin ("{field}" gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for field in FIELDS:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "accounts_user_{field}_trgm"')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0005_accountdeletionjob"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
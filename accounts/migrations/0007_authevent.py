@@ -0,0 +1,79 @@
+# Generated by Django 5.1.15 on 2026-10-16 20:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS "accounts_authevent_created_brin" '
+        'ON "accounts_authevent" USING brin ("created_at")'
+    )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS "accounts_authevent_created_brin"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_user_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuthEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("username", models.CharField(blank=True, max_length=150)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("login", "Login"),
+                            ("login_failed", "Login failed"),
+                            ("logout", "Logout"),
+                            ("recovery_started", "Recovery started"),
+                            ("recovery_failed", "Recovery failed"),
+                            ("otp_failed", "OTP failed"),
+                            ("recovery_completed", "Recovery completed"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ("ip_address", models.GenericIPAddressField(blank=True, null=True)),
+                ("user_agent", models.CharField(blank=True, max_length=512)),
+                ("metadata", models.JSONField(blank=True, default=dict)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="auth_events",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
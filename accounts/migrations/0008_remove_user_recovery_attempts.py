@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-16 21:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0007_authevent"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="user",
+            name="last_recovery_attempt",
+        ),
+        migrations.RemoveField(
+            model_name="user",
+            name="recovery_attempts",
+        ),
+    ]
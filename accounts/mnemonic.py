@@ -0,0 +1,153 @@
+"""Encoded storage format for mnemonic recovery hashes.
+
+Stored hashes are self-describing: ``algorithm$params$salt$digest`` where
+``params`` is a comma separated ``key=value`` list and salt/digest are
+base64. Hashes written before the format existed are a bare hex digest with
+the salt in ``User.mnemonic_salt``; they decode as the original
+PBKDF2-SHA3-256 at 390k rounds and are upgraded on the next successful check.
+
+Phrases themselves are BIP39 English mnemonics. The wordlist index below lets
+forms reject typos and checksum failures before any KDF work is queued.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import secrets
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils.crypto import constant_time_compare
+
+from mnemonic import Mnemonic
+
+from .kdf import KDF_ALGORITHMS, get_kdf_pool
+
+
+LEGACY_ALGORITHM = "pbkdf2_sha3_256"
+LEGACY_PARAMS = {"iterations": 390000}
+SALT_BYTES = 16
+
+BIP39_WORD_COUNTS = (12, 15, 18, 21, 24)
+
+mnemonic_generator = Mnemonic("english")
+WORDLIST_INDEX: dict[str, int] = {word: index for index, word in enumerate(mnemonic_generator.wordlist)}
+
+
+def bip39_checksum_validator(phrase: str) -> None:
+    """Validate wordlist membership and the BIP39 checksum without hashing the phrase."""
+
+    words = phrase.split()
+    if len(words) not in BIP39_WORD_COUNTS:
+        raise ValidationError("Mnemonic phrase has an unexpected number of words.", code="word_count")
+
+    bits = 0
+    for position, word in enumerate(words, start=1):
+        index = WORDLIST_INDEX.get(word)
+        if index is None:
+            raise ValidationError(
+                "Word %(position)s (%(word)s) is not in the recovery wordlist.",
+                code="unknown_word",
+                params={"position": position, "word": word},
+            )
+        bits = (bits << 11) | index
+
+    checksum_bits = len(words) // 3
+    entropy_bits = len(words) * 11 - checksum_bits
+    entropy = (bits >> checksum_bits).to_bytes(entropy_bits // 8, "big")
+    expected = hashlib.sha256(entropy).digest()[0] >> (8 - checksum_bits)
+    if expected != bits & ((1 << checksum_bits) - 1):
+        raise ValidationError(
+            "Mnemonic phrase checksum does not match; check the words and their order.",
+            code="checksum",
+        )
+
+
+@dataclass(frozen=True)
+class DecodedMnemonicHash:
+    algorithm: str
+    params: dict[str, int]
+    salt: bytes
+    digest: bytes
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def encode_mnemonic_hash(algorithm: str, params: dict[str, int], salt: bytes, digest: bytes) -> str:
+    encoded_params = ",".join(f"{key}={value}" for key, value in sorted(params.items()))
+    return f"{algorithm}${encoded_params}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def decode_mnemonic_hash(encoded: str, legacy_salt: bytes | None = None) -> DecodedMnemonicHash | None:
+    """Parse a stored hash, returning ``None`` when it is missing or malformed."""
+
+    if not encoded:
+        return None
+
+    if "$" not in encoded:
+        if not legacy_salt:
+            return None
+        try:
+            digest = bytes.fromhex(encoded)
+        except ValueError:
+            return None
+        return DecodedMnemonicHash(LEGACY_ALGORITHM, dict(LEGACY_PARAMS), bytes(legacy_salt), digest)
+
+    try:
+        algorithm, encoded_params, salt, digest = encoded.split("$")
+        params = {
+            key: int(value)
+            for key, value in (item.split("=", 1) for item in encoded_params.split(",") if item)
+        }
+        return DecodedMnemonicHash(
+            algorithm=algorithm,
+            params=params,
+            salt=base64.b64decode(salt, validate=True),
+            digest=base64.b64decode(digest, validate=True),
+        )
+    except (ValueError, binascii.Error):
+        return None
+
+
+class MnemonicHasher:
+    """Hash and verify recovery phrases using the configured KDF parameters."""
+
+    def __init__(self, algorithm: str | None = None, params: dict[str, int] | None = None):
+        self.algorithm = algorithm or settings.MNEMONIC_HASH_ALGORITHM
+        if self.algorithm not in KDF_ALGORITHMS:
+            raise ValueError(f"Unsupported mnemonic hash algorithm {self.algorithm!r}")
+        self.params = dict(params or settings.MNEMONIC_HASH_PARAMS[self.algorithm])
+
+    def encode(self, phrase: str, salt: bytes | None = None) -> str:
+        salt = salt or secrets.token_bytes(SALT_BYTES)
+        result = get_kdf_pool().derive(self.algorithm, phrase.encode("utf-8"), salt, self.params)
+        return encode_mnemonic_hash(self.algorithm, self.params, salt, result.digest)
+
+    async def aencode(self, phrase: str, salt: bytes | None = None) -> str:
+        salt = salt or secrets.token_bytes(SALT_BYTES)
+        result = await get_kdf_pool().aderive(self.algorithm, phrase.encode("utf-8"), salt, self.params)
+        return encode_mnemonic_hash(self.algorithm, self.params, salt, result.digest)
+
+    def verify(self, phrase: str, decoded: DecodedMnemonicHash) -> bool:
+        if decoded.algorithm not in KDF_ALGORITHMS:
+            return False
+        result = get_kdf_pool().derive(decoded.algorithm, phrase.encode("utf-8"), decoded.salt, decoded.params)
+        return constant_time_compare(result.digest, decoded.digest)
+
+    async def averify(self, phrase: str, decoded: DecodedMnemonicHash) -> bool:
+        if decoded.algorithm not in KDF_ALGORITHMS:
+            return False
+        result = await get_kdf_pool().aderive(
+            decoded.algorithm, phrase.encode("utf-8"), decoded.salt, decoded.params
+        )
+        return constant_time_compare(result.digest, decoded.digest)
+
+    def must_update(self, encoded: str, decoded: DecodedMnemonicHash) -> bool:
+        if "$" not in encoded:
+            return True
+        return decoded.algorithm != self.algorithm or decoded.params != self.params
@@ -2,9 +2,6 @@
 
 from __future__ import annotations
 
-import hashlib
-import secrets
-from datetime import timedelta
 from typing import Optional
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
@@ -12,6 +9,11 @@ from django.core.validators import RegexValidator
 from django.db import models
 from django.utils import timezone
 
+from .mnemonic import MnemonicHasher, decode_mnemonic_hash
+from .revocation import revoke_sessions
+from .session_backend import session_index
+
+
 mnemonic_validator = RegexValidator(
     regex=r"^(\w+\s){23}\w+$",
     message="Mnemonic phrase must contain exactly 24 words.",
@@ -95,67 +97,58 @@ class User(AbstractUser):
     telegram_verified = models.BooleanField(default=False)
 
     mnemonic_salt = models.BinaryField(null=True, blank=True, editable=False)
-    mnemonic_hash = models.CharField(max_length=128, blank=True, editable=False)
+    mnemonic_hash = models.CharField(max_length=255, blank=True, editable=False)
     mnemonic_created_at = models.DateTimeField(null=True, blank=True, editable=False)
     mnemonic_hint = models.CharField(
         max_length=128,
         blank=True,
         help_text="Non-sensitive hint to help the user recall their seed.",
     )
-    recovery_attempts = models.PositiveSmallIntegerField(default=0)
-    last_recovery_attempt = models.DateTimeField(null=True, blank=True)
 
     session_limit = models.PositiveSmallIntegerField(default=5)
 
     objects = UserManager()
 
+    MNEMONIC_HASH_FIELDS = ["mnemonic_hash", "mnemonic_salt"]
+
     EMAIL_FIELD = ""
     USERNAME_FIELD = "username"
     REQUIRED_FIELDS: list[str] = []
 
     def set_mnemonic_phrase(self, phrase: str) -> None:
         mnemonic_validator(phrase)
-        salt = secrets.token_bytes(16)
-        digest = hashlib.pbkdf2_hmac("sha3-256", phrase.encode("utf-8"), salt, 390000)
-        self.mnemonic_salt = salt
-        self.mnemonic_hash = digest.hex()
+        self.mnemonic_hash = MnemonicHasher().encode(phrase)
+        self.mnemonic_salt = None
         self.mnemonic_created_at = timezone.now()
-        self.recovery_attempts = 0
         self.mnemonic_hint = phrase.split()[0]
 
     def check_mnemonic_phrase(self, phrase: str) -> bool:
-        if not self.mnemonic_hash or not self.mnemonic_salt:
+        decoded = decode_mnemonic_hash(self.mnemonic_hash, legacy_salt=self.mnemonic_salt)
+        if decoded is None:
             return False
-        digest = hashlib.pbkdf2_hmac(
-            "sha3-256",
-            phrase.encode("utf-8"),
-            bytes(self.mnemonic_salt),
-            390000,
-        )
-        return digest.hex() == self.mnemonic_hash
-
-    def can_attempt_recovery(self) -> bool:
-        if self.recovery_attempts < 5:
-            return True
-        if not self.last_recovery_attempt:
-            return True
-        return timezone.now() - self.last_recovery_attempt > timedelta(hours=12)
-
-    def register_recovery_attempt(self, success: bool) -> None:
-        self.last_recovery_attempt = timezone.now()
-        if success:
-            self.recovery_attempts = 0
-            type(self).objects.filter(pk=self.pk).update(
-                last_recovery_attempt=self.last_recovery_attempt,
-                recovery_attempts=0,
-            )
-        else:
-            type(self).objects.filter(pk=self.pk).update(
-                last_recovery_attempt=self.last_recovery_attempt,
-                recovery_attempts=models.F("recovery_attempts") + 1,
-            )
-            self.refresh_from_db(fields=["recovery_attempts"])
-
+        hasher = MnemonicHasher()
+        if not hasher.verify(phrase, decoded):
+            return False
+        if hasher.must_update(self.mnemonic_hash, decoded):
+            self.mnemonic_hash = hasher.encode(phrase)
+            self.mnemonic_salt = None
+            if self.pk:
+                self.save(update_fields=self.MNEMONIC_HASH_FIELDS)
+        return True
+
+    async def acheck_mnemonic_phrase(self, phrase: str) -> bool:
+        decoded = decode_mnemonic_hash(self.mnemonic_hash, legacy_salt=self.mnemonic_salt)
+        if decoded is None:
+            return False
+        hasher = MnemonicHasher()
+        if not await hasher.averify(phrase, decoded):
+            return False
+        if hasher.must_update(self.mnemonic_hash, decoded):
+            self.mnemonic_hash = await hasher.aencode(phrase)
+            self.mnemonic_salt = None
+            if self.pk:
+                await self.asave(update_fields=self.MNEMONIC_HASH_FIELDS)
+        return True
 
 
 class RecoverySession(models.Model):
@@ -179,6 +172,15 @@ class RecoverySession(models.Model):
         default=User.NotificationChannel.TELEGRAM,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["expires_at"],
+                condition=models.Q(status="pending"),
+                name="accounts_recovery_pending_idx",
+            ),
+        ]
+
     def mark_verified(self) -> None:
         self.status = self.Status.VERIFIED
         self.save(update_fields=["status"])
@@ -204,8 +206,90 @@ class ActiveSession(models.Model):
 
     class Meta:
         ordering = ["-last_seen"]
+        indexes = [
+            models.Index(fields=["user", "is_active", "-last_seen"], name="accounts_session_recent_idx"),
+        ]
 
     def terminate(self) -> None:
         self.is_active = False
         self.save(update_fields=["is_active"])
+        revoke_sessions([self.session_key])
+        session_index.remove(self.session_key)
+
+
+class AccountDeletionJob(models.Model):
+    """Checkpointed background removal of a user's personal data."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="deletion_jobs")
+    requested_by = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    stage = models.CharField(max_length=64, blank=True)
+    progress = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=models.Q(status__in=["pending", "running"]),
+                name="accounts_one_open_deletion_job",
+            ),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - admin display
+        return f"Deletion of user {self.user_id} ({self.status})"
+
+
+class AuthEvent(models.Model):
+    """Append-only record of authentication activity."""
+
+    class Kind(models.TextChoices):
+        LOGIN = "login", "Login"
+        LOGIN_FAILED = "login_failed", "Login failed"
+        LOGOUT = "logout", "Logout"
+        RECOVERY_STARTED = "recovery_started", "Recovery started"
+        RECOVERY_FAILED = "recovery_failed", "Recovery failed"
+        OTP_FAILED = "otp_failed", "OTP failed"
+        RECOVERY_COMPLETED = "recovery_completed", "Recovery completed"
+
+    user = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="auth_events",
+    )
+    username = models.CharField(max_length=150, blank=True)
+    kind = models.CharField(max_length=32, choices=Kind.choices)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=512, blank=True)
+    metadata = models.JSONField(default=dict, blank=True)
+    # Indexed with BRIN on PostgreSQL (migration 0007): rows arrive in time order.
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:  # pragma: no cover - admin display
+        return f"{self.kind} {self.username} @ {self.created_at:%Y-%m-%d %H:%M:%S}"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Authentication events are append-only.")
+        super().save(*args, **kwargs)
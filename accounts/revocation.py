@@ -0,0 +1,74 @@
+"""Shared session revocation list with a per-process LRU in front of it.
+
+Revoked session keys are stored as individual cache keys (Redis in
+deployment) that expire with the session cookie, so the list prunes itself.
+Each worker remembers recent answers for ``SESSION_REVOCATION_CACHE_TTL``
+seconds: a revoked key is dropped by every worker within that TTL, and most
+requests are answered without leaving the process.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+REVOKED_SESSION_KEY = "accounts:revoked-session:{}"
+
+
+class SessionRevocationList:
+    def __init__(self, ttl: float | None = None, maxsize: int | None = None):
+        self.ttl = settings.SESSION_REVOCATION_CACHE_TTL if ttl is None else ttl
+        self.maxsize = settings.SESSION_REVOCATION_CACHE_SIZE if maxsize is None else maxsize
+        self._entries: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_revoked(self, session_key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_key)
+            if entry is not None:
+                revoked, expires_at = entry
+                # Revocation is permanent, so only "not revoked" answers go stale.
+                if revoked or expires_at > now:
+                    self._entries.move_to_end(session_key)
+                    return revoked
+
+        revoked = cache.get(REVOKED_SESSION_KEY.format(session_key)) is not None
+        self._remember(session_key, revoked, now)
+        return revoked
+
+    def revoke(self, session_keys: Iterable[str]) -> None:
+        session_keys = [key for key in session_keys if key]
+        if not session_keys:
+            return
+        cache.set_many(
+            {REVOKED_SESSION_KEY.format(key): 1 for key in session_keys},
+            timeout=settings.SESSION_COOKIE_AGE,
+        )
+        now = time.monotonic()
+        for key in session_keys:
+            self._remember(key, True, now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, session_key: str, revoked: bool, now: float) -> None:
+        with self._lock:
+            self._entries[session_key] = (revoked, now + self.ttl)
+            self._entries.move_to_end(session_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+revocation_list = SessionRevocationList()
+
+
+def revoke_sessions(session_keys: Iterable[str]) -> None:
+    revocation_list.revoke(session_keys)
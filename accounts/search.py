@@ -0,0 +1,58 @@
+"""Staff-facing user search.
+
+On PostgreSQL the handle columns carry ``pg_trgm`` GIN indexes (see
+migration 0006), so matching uses the indexable ``<%`` word-similarity
+operator and results are ranked by the best similarity across columns.
+Other databases fall back to a case-insensitive prefix match that ranks
+exact handles above prefixes, which is enough for tests and local
+development.
+"""
+
+from __future__ import annotations
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, FloatField, Q, QuerySet, Value, When
+from django.db.models.functions import Greatest
+
+from .models import User
+
+
+SEARCH_FIELDS = ("username", "xmpp_address", "telegram_username")
+
+
+def clean_term(term: str) -> str:
+    return term.strip().lstrip("@")
+
+
+def match_users(term: str, queryset: QuerySet) -> QuerySet:
+    """Filter ``queryset`` to users with a handle matching ``term``."""
+
+    matches = Q()
+    lookup = "trigram_word_similar" if connection.vendor == "postgresql" else "istartswith"
+    for field in SEARCH_FIELDS:
+        matches |= Q(**{f"{field}__{lookup}": term})
+    return queryset.filter(matches)
+
+
+def rank_users(term: str, queryset: QuerySet) -> QuerySet:
+    """Annotate ``queryset`` with ``search_rank``, higher for closer matches."""
+
+    if connection.vendor == "postgresql":
+        rank = Greatest(*(TrigramWordSimilarity(term, field) for field in SEARCH_FIELDS))
+    else:
+        exact = Q()
+        for field in SEARCH_FIELDS:
+            exact |= Q(**{f"{field}__iexact": term})
+        rank = Case(When(exact, then=Value(1.0)), default=Value(0.5), output_field=FloatField())
+    return queryset.annotate(search_rank=rank)
+
+
+def search_users(term: str, queryset: QuerySet | None = None) -> QuerySet:
+    """Filter ``queryset`` to users whose handles match ``term``, best matches first."""
+
+    queryset = User.objects.all() if queryset is None else queryset
+    term = clean_term(term)
+    if not term:
+        return queryset.none()
+    return rank_users(term, match_users(term, queryset)).order_by("-search_rank", "username")
@@ -7,18 +7,17 @@ from dataclasses import dataclass
 from datetime import timedelta
 from typing import Optional
 
+from django.conf import settings
+from django.db.models import Subquery
 from django.utils import timezone
 
-from mnemonic import Mnemonic
-
 from notifications.dispatch import NotificationDispatchService
 
+from .challenges import issue_challenge
+from .mnemonic import mnemonic_generator
 from .models import RecoverySession, User
 
 
-mnemonic_generator = Mnemonic("english")
-
-
 def generate_mnemonic_phrase() -> str:
     return mnemonic_generator.generate(strength=256)
 
@@ -26,31 +25,66 @@ def generate_mnemonic_phrase() -> str:
 @dataclass
 class RecoveryChallenge:
     recovery_session: RecoverySession
-    otp_code: str
+    token: str
 
 
 class RecoveryOrchestrator:
     """Coordinates mnemonic + OTP recovery flows."""
 
     OTP_LENGTH = 6
-    OTP_EXPIRY_MINUTES = 15
 
     def __init__(self, notification_service: Optional[NotificationDispatchService] = None):
         self.notification_service = notification_service or NotificationDispatchService()
 
     def initiate_session(self, user: User) -> RecoveryChallenge:
-        expires_at = timezone.now() + timedelta(minutes=self.OTP_EXPIRY_MINUTES)
+        """Start the OTP step for a user whose mnemonic phrase has been confirmed."""
+
+        expires_at = timezone.now() + timedelta(seconds=settings.RECOVERY_CHALLENGE_TTL)
         session = RecoverySession.objects.create(
             user=user,
             expires_at=expires_at,
             channel_used=user.preferred_channel,
+            mnemonic_confirmed=True,
         )
 
         otp = self._issue_one_time_code()
+        token = issue_challenge(user.pk, session.pk, otp)
         self.notification_service.send_recovery_otp(user, otp)
 
-        return RecoveryChallenge(recovery_session=session, otp_code=otp)
+        return RecoveryChallenge(recovery_session=session, token=token)
 
     def _issue_one_time_code(self) -> str:
         return "".join(secrets.choice("0123456789") for _ in range(self.OTP_LENGTH))
 
+
+def expire_recovery_sessions(batch_size: int = 1000) -> int:
+    """Mark pending recovery sessions past ``expires_at`` as expired, in chunks."""
+
+    stale = RecoverySession.objects.filter(
+        status=RecoverySession.Status.PENDING,
+        expires_at__lte=timezone.now(),
+    ).order_by("expires_at")
+
+    expired = 0
+    while True:
+        updated = RecoverySession.objects.filter(
+            pk__in=Subquery(stale.values("pk")[:batch_size]),
+        ).update(status=RecoverySession.Status.EXPIRED)
+        expired += updated
+        if updated < batch_size:
+            return expired
+
+
+def purge_recovery_sessions(older_than: timedelta, batch_size: int = 1000) -> int:
+    """Delete finished recovery sessions created before ``older_than`` ago."""
+
+    old = RecoverySession.objects.filter(created_at__lt=timezone.now() - older_than).exclude(
+        status=RecoverySession.Status.PENDING
+    )
+
+    purged = 0
+    while True:
+        batch = list(old.values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return purged
+        purged += RecoverySession.objects.filter(pk__in=batch).delete()[0]
@@ -0,0 +1,157 @@
+"""Session engine storing sessions and their metadata in the shared cache.
+
+Session data lives in the configured cache (Redis in deployment) through
+Django's cache backend, so authenticated requests no longer read or write
+``django_session``. Next to each session the engine keeps the metadata that
+``ActiveSession`` records (user agent, IP, created/last seen) plus a per-user
+index, which lets the sessions page list a user's devices without SQL.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.sessions.backends.cache import SessionStore as CacheSessionStore
+from django.core.cache import caches
+
+from config.redis import get_redis_client
+
+
+SESSION_META_KEY = "accounts:session-meta:{}"
+USER_SESSIONS_KEY = "accounts:user-sessions:{}"
+
+
+def _to_datetime(value) -> datetime | None:
+    if value in (None, ""):
+        return None
+    return datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+
+
+class SessionIndex:
+    """Per-user index of session metadata.
+
+    Redis keeps each session's metadata in a hash and the user's session keys
+    in a set; other cache backends fall back to plain values updated with
+    read-modify-write, which is adequate for tests and local development.
+    """
+
+    fields = ("user_id", "user_agent", "ip_address", "created_at", "last_seen")
+
+    @property
+    def cache(self):
+        return caches[settings.SESSION_CACHE_ALIAS]
+
+    def add(self, user_id: int, session_key: str, user_agent: str, ip_address: str | None, seen_at: datetime) -> None:
+        metadata = {
+            "user_id": user_id,
+            "user_agent": user_agent,
+            "ip_address": ip_address or "",
+            "created_at": seen_at.timestamp(),
+            "last_seen": seen_at.timestamp(),
+        }
+        timeout = settings.SESSION_COOKIE_AGE
+        meta_key = SESSION_META_KEY.format(session_key)
+        index_key = USER_SESSIONS_KEY.format(user_id)
+
+        client = get_redis_client(settings.SESSION_CACHE_ALIAS)
+        if client is not None:
+            pipeline = client.pipeline(transaction=True)
+            pipeline.hset(self.cache.make_key(meta_key), mapping=metadata)
+            pipeline.expire(self.cache.make_key(meta_key), timeout)
+            pipeline.sadd(self.cache.make_key(index_key), session_key)
+            pipeline.expire(self.cache.make_key(index_key), timeout)
+            pipeline.execute()
+            return
+
+        self.cache.set(meta_key, metadata, timeout=timeout)
+        session_keys = set(self.cache.get(index_key) or ())
+        session_keys.add(session_key)
+        self.cache.set(index_key, session_keys, timeout=timeout)
+
+    def touch(self, session_key: str, seen_at: datetime) -> None:
+        meta_key = SESSION_META_KEY.format(session_key)
+        client = get_redis_client(settings.SESSION_CACHE_ALIAS)
+        if client is not None:
+            if client.exists(self.cache.make_key(meta_key)):
+                client.hset(self.cache.make_key(meta_key), "last_seen", seen_at.timestamp())
+            return
+
+        metadata = self.cache.get(meta_key)
+        if metadata is not None:
+            metadata["last_seen"] = seen_at.timestamp()
+            self.cache.set(meta_key, metadata, timeout=settings.SESSION_COOKIE_AGE)
+
+    def remove(self, session_key: str) -> None:
+        meta_key = SESSION_META_KEY.format(session_key)
+        client = get_redis_client(settings.SESSION_CACHE_ALIAS)
+        if client is not None:
+            user_id = client.hget(self.cache.make_key(meta_key), "user_id")
+            pipeline = client.pipeline(transaction=True)
+            pipeline.delete(self.cache.make_key(meta_key))
+            if user_id is not None:
+                pipeline.srem(self.cache.make_key(USER_SESSIONS_KEY.format(user_id.decode())), session_key)
+            pipeline.execute()
+            return
+
+        metadata = self.cache.get(meta_key)
+        self.cache.delete(meta_key)
+        if metadata is not None:
+            index_key = USER_SESSIONS_KEY.format(metadata["user_id"])
+            session_keys = set(self.cache.get(index_key) or ())
+            session_keys.discard(session_key)
+            self.cache.set(index_key, session_keys, timeout=settings.SESSION_COOKIE_AGE)
+
+    def list(self, user_id: int) -> list[dict]:
+        index_key = USER_SESSIONS_KEY.format(user_id)
+        client = get_redis_client(settings.SESSION_CACHE_ALIAS)
+        if client is not None:
+            session_keys = [key.decode() for key in client.smembers(self.cache.make_key(index_key))]
+            pipeline = client.pipeline(transaction=False)
+            for session_key in session_keys:
+                pipeline.hgetall(self.cache.make_key(SESSION_META_KEY.format(session_key)))
+            raw_metadata = [
+                {field.decode(): value.decode() for field, value in raw.items()} for raw in pipeline.execute()
+            ]
+        else:
+            session_keys = list(self.cache.get(index_key) or ())
+            found = self.cache.get_many([SESSION_META_KEY.format(key) for key in session_keys])
+            raw_metadata = [found.get(SESSION_META_KEY.format(key)) or {} for key in session_keys]
+
+        sessions = []
+        expired = []
+        for session_key, metadata in zip(session_keys, raw_metadata):
+            if not metadata:
+                expired.append(session_key)
+                continue
+            sessions.append(
+                {
+                    "session_key": session_key,
+                    "user_agent": metadata.get("user_agent", ""),
+                    "ip_address": metadata.get("ip_address") or None,
+                    "created_at": _to_datetime(metadata.get("created_at")),
+                    "last_seen": _to_datetime(metadata.get("last_seen")),
+                }
+            )
+
+        if expired:
+            if client is not None:
+                client.srem(self.cache.make_key(index_key), *expired)
+            else:
+                self.cache.set(index_key, set(session_keys) - set(expired), timeout=settings.SESSION_COOKIE_AGE)
+
+        sessions.sort(key=lambda session: session["last_seen"] or session["created_at"], reverse=True)
+        return sessions
+
+
+session_index = SessionIndex()
+
+
+class SessionStore(CacheSessionStore):
+    """Cache-backed session store that keeps the per-user index in sync."""
+
+    def delete(self, session_key=None):
+        session_key = session_key or self.session_key
+        super().delete(session_key)
+        if session_key:
+            session_index.remove(session_key)
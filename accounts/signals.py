@@ -3,24 +3,29 @@
 from __future__ import annotations
 
 from django.contrib.auth import get_user_model
-from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Subquery
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import ActiveSession
+from .backends import invalidate_cached_users
+from .events import auth_events, record_auth_event
+from .models import ActiveSession, AuthEvent
+from .revocation import revoke_sessions
+from .session_backend import session_index
+from .utils import get_client_ip, get_user_agent
 
 
 User = get_user_model()
 
 
-def _get_user_agent(request) -> str:
-    return request.META.get("HTTP_USER_AGENT", "")[:512]
-
-
-def _get_ip(request) -> str | None:
-    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
-    if forwarded:
-        return forwarded.split(",")[0].strip()
-    return request.META.get("REMOTE_ADDR")
+def _forget_sessions(session_keys: list[str]) -> None:
+    revoke_sessions(session_keys)
+    for session_key in session_keys:
+        session_index.remove(session_key)
 
 
 @receiver(user_logged_in)
@@ -30,27 +35,63 @@ def track_login(sender, request, user: User, **kwargs):  # pragma: no cover - si
         request.session.save()
         session_key = request.session.session_key
 
-    ActiveSession.objects.update_or_create(
-        user=user,
-        session_key=session_key,
-        defaults={
-            "user_agent": _get_user_agent(request),
-            "ip_address": _get_ip(request),
-            "is_active": True,
-        },
-    )
-
-    active_sessions = list(user.sessions.filter(is_active=True).order_by("-last_seen"))
-    for session in active_sessions[user.session_limit :]:
-        session.terminate()
+    user_agent = get_user_agent(request)
+    ip_address = get_client_ip(request)
+    record_auth_event(AuthEvent.Kind.LOGIN, request=request, user=user)
+    session_index.add(user.pk, session_key, user_agent, ip_address, timezone.now())
+
+    with transaction.atomic():
+        ActiveSession.objects.update_or_create(
+            user=user,
+            session_key=session_key,
+            defaults={
+                "user_agent": user_agent,
+                "ip_address": ip_address,
+                "is_active": True,
+            },
+        )
+
+        # Everything past the newest ``session_limit`` rows is deactivated in one
+        # UPDATE; the keys are read first so other workers can be told to drop them.
+        newest = user.sessions.filter(is_active=True).order_by("-last_seen", "-pk").values("pk")
+        evicted = list(
+            user.sessions.filter(is_active=True)
+            .exclude(pk__in=Subquery(newest[: user.session_limit]))
+            .values_list("session_key", flat=True)
+        )
+        if evicted:
+            ActiveSession.objects.filter(session_key__in=evicted).update(is_active=False)
+            transaction.on_commit(lambda: _forget_sessions(evicted))
 
 
 @receiver(user_logged_out)
 def track_logout(sender, request, user: User, **kwargs):  # pragma: no cover - signal
     if not user.is_authenticated:
         return
+    record_auth_event(AuthEvent.Kind.LOGOUT, request=request, user=user)
     session_key = getattr(request.session, "session_key", None)
     if not session_key:
         return
     ActiveSession.objects.filter(user=user, session_key=session_key).update(is_active=False)
 
+
+@receiver(user_login_failed)
+def track_login_failure(sender, credentials, request=None, **kwargs):  # pragma: no cover - signal
+    record_auth_event(AuthEvent.Kind.LOGIN_FAILED, request=request, username=credentials.get("username", ""))
+
+
+@receiver(request_finished)
+def flush_auth_events(sender, **kwargs):  # pragma: no cover - signal
+    if not auth_events.is_due():
+        return
+    auth_events.flush()
+    # Django's own request_finished handler has already run, so nothing else
+    # would release the connection the flush opened. Inside an atomic block
+    # (the test client) the connection is not ours to close.
+    if not connection.in_atomic_block:
+        close_old_connections()
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):  # pragma: no cover - signal
+    invalidate_cached_users([instance.pk])
@@ -0,0 +1,48 @@
+"""Celery tasks for the accounts domain."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .deletion import run_account_deletion
+from .heartbeat import flush_heartbeats
+from .models import AccountDeletionJob
+from .services import expire_recovery_sessions, purge_recovery_sessions
+
+
+@shared_task(name="accounts.flush_session_heartbeats")
+def flush_session_heartbeats():  # pragma: no cover - scheduled task
+    return flush_heartbeats()
+
+
+@shared_task(name="accounts.sweep_recovery_sessions")
+def sweep_recovery_sessions():  # pragma: no cover - scheduled task
+    return {
+        "expired": expire_recovery_sessions(),
+        "purged": purge_recovery_sessions(timedelta(days=settings.RECOVERY_SESSION_RETENTION_DAYS)),
+    }
+
+
+@shared_task(name="accounts.delete_account")
+def delete_account(job_id: int):  # pragma: no cover - background task
+    # Bounded work per run keeps each task short; unfinished jobs requeue themselves.
+    if not run_account_deletion(job_id, max_chunks=settings.ACCOUNT_DELETION_CHUNKS_PER_TASK):
+        delete_account.delay(job_id)
+
+
+@shared_task(name="accounts.resume_account_deletions")
+def resume_account_deletions():  # pragma: no cover - scheduled task
+    stalled_before = timezone.now() - timedelta(minutes=10)
+    job_ids = list(
+        AccountDeletionJob.objects.filter(
+            status__in=[AccountDeletionJob.Status.PENDING, AccountDeletionJob.Status.RUNNING],
+            updated_at__lt=stalled_before,
+        ).values_list("pk", flat=True)
+    )
+    for job_id in job_ids:
+        delete_account.delay(job_id)
+    return len(job_ids)
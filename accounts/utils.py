@@ -0,0 +1,41 @@
+"""Request helpers shared across the accounts app."""
+
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+_warned_untrusted_proxy = False
+
+
+def get_user_agent(request) -> str:
+    return request.META.get("HTTP_USER_AGENT", "")[:512]
+
+
+def get_client_ip(request) -> str | None:
+    """Return the address the nearest untrusted hop connected from.
+
+    Clients can prepend anything to ``X-Forwarded-For``, so only the entry
+    added by the outermost of ``TRUSTED_PROXY_COUNT`` proxies is believed.
+    """
+
+    global _warned_untrusted_proxy
+
+    proxies = settings.TRUSTED_PROXY_COUNT
+    if not proxies and not _warned_untrusted_proxy and "HTTP_X_FORWARDED_FOR" in request.META:
+        # Behind a proxy every client would share the proxy's address, and
+        # with it one set of per-IP throttle buckets. Say so once per process.
+        _warned_untrusted_proxy = True
+        logger.warning(
+            "X-Forwarded-For is ignored because TRUSTED_PROXY_COUNT is 0; all clients behind a proxy "
+            "share its address for throttling. Set TRUSTED_PROXY_COUNT to the number of proxies."
+        )
+    if proxies:
+        forwarded = [hop.strip() for hop in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if hop.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR")
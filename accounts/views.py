@@ -3,18 +3,26 @@
 from __future__ import annotations
 
 from django import forms
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView as DjangoLoginView, LogoutView as DjangoLogoutView
+from django.db import transaction
 from django.http import Http404, HttpRequest, HttpResponse
 from django.shortcuts import redirect, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.views.generic import FormView, TemplateView, UpdateView, View
 
+from .challenges import CHALLENGE_COOKIE, consume_challenge, load_challenge
+from .events import record_auth_event
 from .forms import LoginForm, MnemonicResetForm, ProfileUpdateForm, RegistrationForm
-from .models import ActiveSession, RecoverySession, User
+from .kdf import KDFPoolOverloaded
+from .models import ActiveSession, AuthEvent, RecoverySession, User
 from .services import RecoveryOrchestrator, generate_mnemonic_phrase
+from .session_backend import session_index
+from .throttling import SlidingWindowThrottle
 
 
 class RegisterView(FormView):
@@ -24,7 +32,11 @@ class RegisterView(FormView):
     def form_valid(self, form: RegistrationForm) -> HttpResponse:
         mnemonic = generate_mnemonic_phrase()
         user: User = form.save(commit=False)
-        user.set_mnemonic_phrase(mnemonic)
+        try:
+            user.set_mnemonic_phrase(mnemonic)
+        except KDFPoolOverloaded:
+            messages.error(self.request, "The server is busy. Please try again in a moment.")
+            return self.form_invalid(form)
         user.save()
         form.save_m2m()
 
@@ -44,6 +56,22 @@ class LoginView(DjangoLoginView):
     template_name = "accounts/login.html"
     authentication_form = LoginForm
     redirect_authenticated_user = True
+    throttle = SlidingWindowThrottle("login")
+
+    def post(self, request, *args, **kwargs):  # type: ignore[override]
+        if self.throttle.is_limited(request, request.POST.get("username")):
+            messages.error(request, "Too many login attempts. Try again later.")
+            form = self.get_form_class()(request)
+            return self.render_to_response(self.get_context_data(form=form), status=429)
+        return super().post(request, *args, **kwargs)
+
+    def form_valid(self, form):  # type: ignore[override]
+        self.throttle.reset(form.get_user().get_username())
+        return super().form_valid(form)
+
+    def form_invalid(self, form):  # type: ignore[override]
+        self.throttle.hit(self.request, form.data.get("username"))
+        return super().form_invalid(form)
 
 
 class LogoutView(DjangoLogoutView):
@@ -68,40 +96,62 @@ class MnemonicRecoveryView(FormView):
     form_class = MnemonicResetForm
     success_url = reverse_lazy("accounts:login")
     orchestrator_class = RecoveryOrchestrator
+    throttle = SlidingWindowThrottle("recovery")
 
     def form_valid(self, form: MnemonicResetForm) -> HttpResponse:
         username = form.cleaned_data["username"]
         phrase = form.cleaned_data["mnemonic_phrase"]
 
+        if self.throttle.is_limited(self.request, username):
+            messages.error(self.request, "Recovery temporarily locked. Try again later.")
+            return self.form_invalid(form)
+
         try:
             user = User.objects.get(username=username, is_active=True)
         except User.DoesNotExist:
+            self.throttle.hit(self.request, username)
+            record_auth_event(
+                AuthEvent.Kind.RECOVERY_FAILED, request=self.request, username=username, reason="unknown_user"
+            )
             messages.error(self.request, "Invalid recovery information.")
             return self.form_invalid(form)
 
-        if not user.can_attempt_recovery():
-            messages.error(self.request, "Recovery temporarily locked. Try again later.")
+        try:
+            phrase_matches = user.check_mnemonic_phrase(phrase)
+        except KDFPoolOverloaded:
+            messages.error(self.request, "Recovery is busy. Please try again in a moment.")
             return self.form_invalid(form)
 
-        if not user.check_mnemonic_phrase(phrase):
-            user.register_recovery_attempt(success=False)
+        if not phrase_matches:
+            self.throttle.hit(self.request, username)
+            record_auth_event(
+                AuthEvent.Kind.RECOVERY_FAILED, request=self.request, user=user, reason="mnemonic_mismatch"
+            )
             messages.error(self.request, "Mnemonic phrase mismatch.")
             return self.form_invalid(form)
 
-        orchestrator = self.orchestrator_class()
-        challenge = orchestrator.initiate_session(user)
-        challenge.recovery_session.mnemonic_confirmed = True
-        challenge.recovery_session.save(update_fields=["mnemonic_confirmed"])
-        request = self.request
-        request.session["recovery_session_id"] = challenge.recovery_session.pk
-        request.session["recovery_otp"] = challenge.otp_code
-        request.session["recovery_user_id"] = user.pk
-        request.session.set_expiry(15 * 60)
-
-        user.register_recovery_attempt(success=True)
-        messages.info(request, "OTP sent via your preferred channel.")
+        challenge = self.orchestrator_class().initiate_session(user)
+        record_auth_event(
+            AuthEvent.Kind.RECOVERY_STARTED,
+            request=self.request,
+            user=user,
+            recovery_session=challenge.recovery_session.pk,
+        )
 
-        return redirect("accounts:verify_otp")
+        self.throttle.reset(username)
+        messages.info(self.request, "OTP sent via your preferred channel.")
+
+        response = redirect("accounts:verify_otp")
+        response.set_cookie(
+            CHALLENGE_COOKIE,
+            challenge.token,
+            max_age=settings.RECOVERY_CHALLENGE_TTL,
+            path=reverse("accounts:verify_otp"),
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite="Lax",
+        )
+        return response
 
 
 class SessionListView(LoginRequiredMixin, TemplateView):
@@ -109,7 +159,7 @@ class SessionListView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):  # type: ignore[override]
         context = super().get_context_data(**kwargs)
-        context["sessions"] = self.request.user.sessions.filter(is_active=True)
+        context["sessions"] = session_index.list(self.request.user.pk)
         return context
 
 
@@ -143,47 +193,65 @@ class OTPVerificationView(FormView):
             return data
 
     form_class = OTPForm
+    throttle = SlidingWindowThrottle("otp")
 
     def dispatch(self, request, *args, **kwargs):  # type: ignore[override]
-        if not request.session.get("recovery_session_id"):
-            return redirect("accounts:recovery")
+        self.challenge = load_challenge(request.COOKIES.get(CHALLENGE_COOKIE))
+        if self.challenge is None:
+            response = redirect("accounts:recovery")
+            response.delete_cookie(CHALLENGE_COOKIE, path=reverse("accounts:verify_otp"))
+            return response
         return super().dispatch(request, *args, **kwargs)
 
     def form_valid(self, form):  # type: ignore[override]
-        session_id = self.request.session.get("recovery_session_id")
-        user_id = self.request.session.get("recovery_user_id")
-        otp_expected = self.request.session.get("recovery_otp")
-        otp_submitted = form.cleaned_data["otp_code"]
+        challenge = self.challenge
+        throttle_identity = f"id:{challenge.user_id}"
 
-        if otp_expected != otp_submitted:
-            messages.error(self.request, "Incorrect OTP. Try again.")
+        if self.throttle.is_limited(self.request, throttle_identity):
+            messages.error(self.request, "Too many incorrect codes. Start recovery again later.")
             return self.form_invalid(form)
 
-        try:
-            recovery_session = RecoverySession.objects.get(pk=session_id)
-        except RecoverySession.DoesNotExist as exc:  # pragma: no cover - guard
-            raise Http404 from exc
+        if not challenge.check_otp(form.cleaned_data["otp_code"]):
+            self.throttle.hit(self.request, throttle_identity)
+            record_auth_event(
+                AuthEvent.Kind.OTP_FAILED,
+                request=self.request,
+                user_id=challenge.user_id,
+                recovery_session=challenge.recovery_session_id,
+            )
+            messages.error(self.request, "Incorrect OTP. Try again.")
+            return self.form_invalid(form)
 
-        if not recovery_session.is_active():
+        if not consume_challenge(challenge):
             messages.error(self.request, "Recovery session expired.")
             return redirect("accounts:recovery")
 
-        try:
-            user = User.objects.get(pk=user_id, is_active=True)
-        except User.DoesNotExist as exc:  # pragma: no cover - guard
-            raise Http404 from exc
-
-        user.set_password(form.cleaned_data["new_password1"])
-        user.save(update_fields=["password"])
-
-        recovery_session.mnemonic_confirmed = True
-        recovery_session.otp_confirmed = True
-        recovery_session.save(update_fields=["mnemonic_confirmed", "otp_confirmed"])
-        recovery_session.mark_verified()
-
-        for key in ["recovery_session_id", "recovery_otp", "recovery_user_id"]:
-            if key in self.request.session:
-                del self.request.session[key]
-
+        with transaction.atomic():
+            verified = RecoverySession.objects.filter(
+                pk=challenge.recovery_session_id,
+                user_id=challenge.user_id,
+                status=RecoverySession.Status.PENDING,
+                expires_at__gt=timezone.now(),
+            ).update(status=RecoverySession.Status.VERIFIED, mnemonic_confirmed=True, otp_confirmed=True)
+            if not verified:
+                messages.error(self.request, "Recovery session expired.")
+                return redirect("accounts:recovery")
+
+            try:
+                user = User.objects.get(pk=challenge.user_id, is_active=True)
+            except User.DoesNotExist as exc:  # pragma: no cover - guard
+                raise Http404 from exc
+
+            user.set_password(form.cleaned_data["new_password1"])
+            user.save(update_fields=["password"])
+
+        record_auth_event(
+            AuthEvent.Kind.RECOVERY_COMPLETED,
+            request=self.request,
+            user=user,
+            recovery_session=challenge.recovery_session_id,
+        )
         messages.success(self.request, "Password reset successfully. You may now log in.")
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        response.delete_cookie(CHALLENGE_COOKIE, path=reverse("accounts:verify_otp"))
+        return response
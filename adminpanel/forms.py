@@ -23,6 +23,10 @@ class NodeConfigurationForm(forms.ModelForm):
             "rpc_username",
             "rpc_password",
             "headers",
+            "connect_timeout",
+            "read_timeout",
+            "pool_size",
+            "max_retries",
             "is_active",
         )
 
@@ -13,4 +13,5 @@ urlpatterns = [
     path("notifications/", views.NotificationTemplateManageView.as_view(), name="notification_templates"),
     path("groups/", views.MembershipGroupManageView.as_view(), name="groups"),
     path("plans/", views.MembershipPlanManageView.as_view(), name="plans"),
+    path("users/search/", views.UserSearchView.as_view(), name="user_search"),
 ]
@@ -4,10 +4,12 @@ from __future__ import annotations
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import JsonResponse
 from django.urls import reverse_lazy
-from django.views.generic import DetailView, FormView, ListView, TemplateView, UpdateView
+from django.views.generic import DetailView, FormView, ListView, TemplateView, UpdateView, View
 from django.views.generic.edit import FormMixin
 
+from accounts.search import search_users
 from analytics.services import membership_summary, support_summary, wallet_summary
 from memberships.models import MembershipGroup, MembershipPlan
 from notifications.models import NotificationTemplate
@@ -143,3 +145,27 @@ class MembershipPlanManageView(LoginRequiredMixin, StaffRequiredMixin, FormMixin
             return self.form_valid(form)
         return self.form_invalid(form)
 
+
+class UserSearchView(LoginRequiredMixin, StaffRequiredMixin, View):
+    """JSON lookup of users by username or contact handle."""
+
+    limit = 20
+
+    def get(self, request, *args, **kwargs):
+        users = search_users(request.GET.get("q", "")).only(
+            "pk", "username", "xmpp_address", "telegram_username", "is_active"
+        )[: self.limit]
+        return JsonResponse(
+            {
+                "results": [
+                    {
+                        "id": user.pk,
+                        "username": user.username,
+                        "xmpp_address": user.xmpp_address,
+                        "telegram_username": user.telegram_username,
+                        "is_active": user.is_active,
+                    }
+                    for user in users
+                ]
+            }
+        )
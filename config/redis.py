@@ -0,0 +1,20 @@
+"""Access to the Redis client behind the configured cache."""
+
+from __future__ import annotations
+
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+
+
+def get_redis_client(alias: str = "default", key: str | None = None):
+    """Return a raw ``redis.Redis`` client, or ``None`` when the cache is not Redis.
+
+    Callers needing hashes or sets use this and fall back to the plain cache
+    API otherwise (tests and local development run on the in-memory cache).
+    Keys should go through ``caches[alias].make_key`` so prefixes still apply.
+    """
+
+    cache = caches[alias]
+    if not isinstance(cache, RedisCache):
+        return None
+    return cache._cache.get_client(key, write=True)
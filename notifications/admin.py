@@ -25,6 +25,6 @@ class NotificationPreferenceAdmin(admin.ModelAdmin):
 class NotificationLogAdmin(admin.ModelAdmin):
     list_display = ("user", "channel", "status", "created_at", "sent_at")
     list_filter = ("channel", "status", "created_at")
-    search_fields = ("user__username", "payload")
+    search_fields = ("user__username",)
     readonly_fields = ("payload",)
 
@@ -11,11 +11,14 @@ from django.template import Template, Context
 from telegram import Bot
 from telegram.error import TelegramError
 
-from .models import NotificationLog, NotificationPreference, NotificationTemplate
+from .models import NotificationLog, NotificationTemplate
+from .preferences import get_channel_map
 
 
 logger = logging.getLogger(__name__)
 
+OTP_MASK = "******"
+
 
 def render_template(body: str, context: dict[str, Any]) -> str:
     template = Template(body)
@@ -33,16 +36,20 @@ class NotificationDispatchService:
     # ------------------------------------------------------------------
 
     def send_recovery_otp(self, user, otp_code: str) -> NotificationLog:
+        expires_in = settings.RECOVERY_CHALLENGE_TTL // 60
         context = {
             "username": user.username,
             "otp": otp_code,
+            "expires_in": expires_in,
         }
-        default_message = f"Your password reset code is {otp_code}. It expires in 15 minutes."
+        default_message = f"Your password reset code is {otp_code}. It expires in {expires_in} minutes."
         return self.send_event(
             user=user,
             event_code="accounts.recovery.otp",
             context=context,
             fallback_body=default_message,
+            # The code only goes into the outgoing message, never into the log.
+            logged_context={**context, "otp": OTP_MASK},
         )
 
     def send_event(
@@ -52,7 +59,15 @@ class NotificationDispatchService:
         context: dict[str, Any],
         fallback_body: str = "",
         channel: str | None = None,
+        logged_context: dict[str, Any] | None = None,
     ) -> NotificationLog:
+        """Render and send one notification.
+
+        ``context`` renders the message; ``logged_context``, when given, is
+        what ``NotificationLog.payload`` keeps instead, so secrets in the
+        message need not be stored.
+        """
+
         channel = channel or user.preferred_channel
         template = NotificationTemplate.objects.filter(
             code=event_code,
@@ -68,7 +83,7 @@ class NotificationDispatchService:
             user=user,
             channel=channel,
             template=template,
-            payload=context,
+            payload=context if logged_context is None else logged_context,
         )
 
         if not self._is_enabled(user, channel):
@@ -112,16 +127,13 @@ class NotificationDispatchService:
         # TODO: integrate actual Jabber/XMPP send logic via slixmpp.
         if not user.xmpp_address:
             raise RuntimeError("Jabber address missing")
-        logger.info("Simulated Jabber message to %s: %s", user.xmpp_address, message)
+        # Messages can carry one-time codes, so only their size is logged.
+        logger.info("Simulated Jabber message to %s (%s characters)", user.xmpp_address, len(message))
 
     # ------------------------------------------------------------------
     # Utilities
     # ------------------------------------------------------------------
 
     def _is_enabled(self, user, channel: str) -> bool:
-        try:
-            preference = NotificationPreference.objects.get(user=user, channel=channel)
-        except NotificationPreference.DoesNotExist:
-            return True
-        return preference.enabled
+        return get_channel_map(user.pk).get(channel, True)
 
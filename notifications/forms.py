@@ -4,7 +4,8 @@ from __future__ import annotations
 
 from django import forms
 
-from .models import NotificationPreference
+from .models import NotificationPreference, NotificationTemplate
+from .preferences import get_channel_map, invalidate_channel_map
 
 
 class NotificationPreferenceForm(forms.ModelForm):
@@ -19,17 +20,21 @@ class NotificationPreferencesForm(forms.Form):
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop("user")
         super().__init__(*args, **kwargs)
-        for preference in self.user.notification_preferences.all():
-            field_name = f"channel_{preference.channel}"
-            self.fields[field_name] = forms.BooleanField(
-                label=preference.get_channel_display(),
+        self.channel_map = get_channel_map(self.user.pk)
+        for channel, label in NotificationTemplate.Channel.choices:
+            self.fields[f"channel_{channel}"] = forms.BooleanField(
+                label=label,
                 required=False,
-                initial=preference.enabled,
+                initial=self.channel_map[channel],
             )
 
     def save(self):
-        for preference in self.user.notification_preferences.all():
-            field_name = f"channel_{preference.channel}"
-            preference.enabled = self.cleaned_data.get(field_name, False)
-            preference.save(update_fields=["enabled", "updated_at"])
-
+        for channel, _ in NotificationTemplate.Channel.choices:
+            enabled = self.cleaned_data.get(f"channel_{channel}", False)
+            if enabled != self.channel_map[channel]:
+                NotificationPreference.objects.update_or_create(
+                    user=self.user,
+                    channel=channel,
+                    defaults={"enabled": enabled},
+                )
+        invalidate_channel_map(self.user.pk)
@@ -0,0 +1,24 @@
+"""Long-poll the Telegram Bot API and resolve users' chat IDs."""
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.telegram import TelegramAPIError, TelegramUpdateConsumer
+
+
+class Command(BaseCommand):
+    help = "Consume Telegram bot updates and store chat IDs for users who messaged the bot."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Stop after the first empty poll.")
+        parser.add_argument("--batch-size", type=int, default=100, help="Updates per getUpdates call (max 100).")
+        parser.add_argument("--poll-timeout", type=int, default=None, help="Long-poll timeout in seconds.")
+
+    def handle(self, *args, **options):
+        try:
+            consumer = TelegramUpdateConsumer(batch_size=options["batch_size"], poll_timeout=options["poll_timeout"])
+            resolved = consumer.run(stop_when_idle=options["once"])
+        except TelegramAPIError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(self.style.SUCCESS(f"Resolved {resolved} Telegram chat ids."))
@@ -0,0 +1,37 @@
+"""Effective per-user channel preferences.
+
+Every channel is enabled unless the user has saved a ``NotificationPreference``
+row saying otherwise, so rows only exist for choices a user actually made.
+The resolved map is cached per user and invalidated whenever a preference
+row is written or deleted.
+"""
+
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import NotificationPreference, NotificationTemplate
+
+
+CHANNEL_MAP_KEY = "notifications:channel-map:{}"
+
+
+def default_channel_map() -> dict[str, bool]:
+    return {channel: True for channel, _ in NotificationTemplate.Channel.choices}
+
+
+def get_channel_map(user_id: int) -> dict[str, bool]:
+    key = CHANNEL_MAP_KEY.format(user_id)
+    channel_map = cache.get(key)
+    if channel_map is None:
+        channel_map = default_channel_map()
+        channel_map.update(
+            NotificationPreference.objects.filter(user_id=user_id).values_list("channel", "enabled")
+        )
+        cache.set(key, channel_map, timeout=settings.NOTIFICATION_PREFERENCE_CACHE_TIMEOUT)
+    return channel_map
+
+
+def invalidate_channel_map(user_id: int) -> None:
+    cache.delete(CHANNEL_MAP_KEY.format(user_id))
@@ -0,0 +1,150 @@
+"""Telegram Bot API update consumer.
+
+Telegram only lets a bot message users who have written to it first, and the
+chat ID needed for ``sendMessage`` is only visible in the updates the bot
+receives. The consumer long-polls ``getUpdates``, collects the sender of
+every private message in a batch and resolves ``User.telegram_username`` to
+``telegram_chat_id`` with one bulk UPDATE per batch. Users whose chat ID is
+already set are left alone.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Lower
+
+from accounts.backends import invalidate_cached_users
+from accounts.models import User
+
+
+logger = logging.getLogger(__name__)
+
+UPDATE_OFFSET_KEY = "notifications:telegram:update-offset"
+
+
+class TelegramAPIError(RuntimeError):
+    pass
+
+
+@dataclass
+class BatchResult:
+    updates: int
+    senders: int
+    resolved: int
+
+
+def extract_chat_ids(updates: list[dict]) -> dict[str, str]:
+    """Map lowercased usernames to the private chat they wrote from."""
+
+    chat_ids: dict[str, str] = {}
+    for update in updates:
+        message = update.get("message") or update.get("edited_message")
+        if not message:
+            continue
+        chat = message.get("chat") or {}
+        username = chat.get("username") or (message.get("from") or {}).get("username")
+        if chat.get("type") != "private" or not username or "id" not in chat:
+            continue
+        # Later updates win, matching the order Telegram delivered them in.
+        chat_ids[username.lower()] = str(chat["id"])
+    return chat_ids
+
+
+def resolve_chat_ids(chat_ids: dict[str, str]) -> int:
+    """Store chat IDs for matching users in a single UPDATE; returns rows changed.
+
+    Handles are not unique and can change hands, so only users without a
+    chat ID are filled in; a resolved chat ID is never overwritten.
+    """
+
+    if not chat_ids:
+        return 0
+
+    user_ids = list(
+        User.objects.alias(username_lower=Lower("telegram_username"))
+        .filter(username_lower__in=list(chat_ids), telegram_chat_id="", telegram_verified=False)
+        .values_list("pk", flat=True)
+    )
+    if not user_ids:
+        return 0
+
+    chat_id_case = Case(
+        *(When(telegram_username__iexact=username, then=Value(chat_id)) for username, chat_id in chat_ids.items()),
+        default=F("telegram_chat_id"),
+    )
+    updated = User.objects.filter(pk__in=user_ids).update(telegram_chat_id=chat_id_case, telegram_verified=True)
+    invalidate_cached_users(user_ids)
+    return updated
+
+
+class TelegramUpdateConsumer:
+    """Long-polling ``getUpdates`` loop that processes updates a batch at a time."""
+
+    def __init__(
+        self,
+        token: str | None = None,
+        api_base_url: str | None = None,
+        poll_timeout: int | None = None,
+        batch_size: int = 100,
+        session: requests.Session | None = None,
+    ):
+        self.token = token or settings.TELEGRAM_BOT_TOKEN
+        if not self.token:
+            raise TelegramAPIError("Telegram bot token not configured")
+        self.api_base_url = (api_base_url or settings.TELEGRAM_API_BASE_URL).rstrip("/")
+        self.poll_timeout = settings.TELEGRAM_POLL_TIMEOUT if poll_timeout is None else poll_timeout
+        self.batch_size = max(1, min(batch_size, 100))
+        self.session = session or requests.Session()
+
+    @property
+    def offset(self) -> int | None:
+        return cache.get(UPDATE_OFFSET_KEY)
+
+    def get_updates(self, offset: int | None) -> list[dict]:
+        params = {"timeout": self.poll_timeout, "limit": self.batch_size, "allowed_updates": '["message"]'}
+        if offset is not None:
+            params["offset"] = offset
+        try:
+            response = self.session.get(
+                f"{self.api_base_url}/bot{self.token}/getUpdates",
+                params=params,
+                # Leave the server room to answer an idle long poll.
+                timeout=self.poll_timeout + 10,
+            )
+            data = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            raise TelegramAPIError(f"getUpdates failed: {exc}") from exc
+        if not data.get("ok"):
+            raise TelegramAPIError(f"getUpdates failed: {data.get('description', response.status_code)}")
+        return data["result"]
+
+    def poll_once(self) -> BatchResult:
+        updates = self.get_updates(self.offset)
+        if not updates:
+            return BatchResult(updates=0, senders=0, resolved=0)
+
+        chat_ids = extract_chat_ids(updates)
+        resolved = resolve_chat_ids(chat_ids)
+        # Acknowledge only after the batch is stored; Telegram drops confirmed updates.
+        cache.set(UPDATE_OFFSET_KEY, max(update["update_id"] for update in updates) + 1, timeout=None)
+        if resolved:
+            logger.info("Resolved %s Telegram chat ids from %s updates", resolved, len(updates))
+        return BatchResult(updates=len(updates), senders=len(chat_ids), resolved=resolved)
+
+    def run(self, max_batches: int | None = None, stop_when_idle: bool = False) -> int:
+        """Poll until ``max_batches`` have been processed; returns users resolved."""
+
+        resolved = batches = 0
+        while max_batches is None or batches < max_batches:
+            result = self.poll_once()
+            batches += 1
+            resolved += result.resolved
+            if stop_when_idle and not result.updates:
+                break
+        return resolved
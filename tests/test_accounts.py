@@ -1,12 +1,508 @@
-from django.contrib.auth import get_user_model
+import csv
+import hashlib
+import io
+import json
+import logging
+import secrets
+from datetime import timedelta
+
+import pytest
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.signals import user_logged_in
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management import call_command
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+
+from accounts.backends import CachedModelBackend
+from accounts.challenges import CHALLENGE_COOKIE, issue_challenge
+from accounts.deletion import run_account_deletion, schedule_account_deletion
+from accounts.events import AuthEventQueue, auth_events
+from accounts.forms import MnemonicResetForm
+from accounts.heartbeat import HeartbeatBuffer, flush_heartbeats
+from accounts.kdf import KDFPool, KDFPoolOverloaded
+from accounts.middleware import SessionRevocationMiddleware
+from accounts.mnemonic import bip39_checksum_validator, decode_mnemonic_hash, mnemonic_generator
+from accounts.models import AccountDeletionJob, ActiveSession, AuthEvent, RecoverySession
+from accounts.revocation import revocation_list
+from accounts.services import RecoveryOrchestrator, expire_recovery_sessions, purge_recovery_sessions
+from accounts.session_backend import session_index
+from accounts.throttling import SlidingWindowThrottle, ThrottleRule
+from accounts.utils import get_client_ip
+from notifications.dispatch import NotificationDispatchService
+from notifications.models import NotificationLog, NotificationTemplate
+from wallets.models import Currency, WalletAccount
+
+PHRASE = """alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu nu xi omicron pi rho sigma tau upsilon phi chi psi omega"""
 
 
 def test_user_mnemonic_roundtrip(db):
     User = get_user_model()
     user = User.objects.create_user(username="tester", password="secret1234")
-    phrase = """alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu nu xi omicron pi rho sigma tau upsilon phi chi psi omega"""
+    phrase = PHRASE
     user.set_mnemonic_phrase(phrase)
     user.save()
 
     assert user.check_mnemonic_phrase(phrase) is True
     assert user.check_mnemonic_phrase(phrase.replace("alpha", "wrong")) is False
+
+
+def test_kdf_pool_reports_timings_and_rejects_when_full():
+    pool = KDFPool(max_workers=1, max_pending=1)
+    try:
+        result = pool.derive("pbkdf2_sha3_256", b"phrase", b"salt", {"iterations": 1000})
+    finally:
+        pool.shutdown()
+
+    assert result.digest == hashlib.pbkdf2_hmac("sha3-256", b"phrase", b"salt", 1000)
+    assert result.compute_time > 0
+    assert result.queue_wait >= 0
+    assert pool.pending == 0
+
+    with pytest.raises(KDFPoolOverloaded):
+        KDFPool(max_workers=1, max_pending=0).submit("pbkdf2_sha3_256", b"phrase", b"salt", {"iterations": 1000})
+
+
+@override_settings(MNEMONIC_HASH_ALGORITHM="scrypt", MNEMONIC_HASH_PARAMS={"scrypt": {"n": 1024, "r": 8, "p": 1}})
+def test_legacy_mnemonic_hash_is_upgraded_on_successful_check(db):
+    User = get_user_model()
+    user = User.objects.create_user(username="legacy", password="secret1234")
+    salt = secrets.token_bytes(16)
+    user.mnemonic_salt = salt
+    user.mnemonic_hash = hashlib.pbkdf2_hmac("sha3-256", PHRASE.encode(), salt, 390000).hex()
+    user.save()
+
+    assert user.check_mnemonic_phrase(PHRASE) is True
+
+    user.refresh_from_db()
+    decoded = decode_mnemonic_hash(user.mnemonic_hash)
+    assert user.mnemonic_hash.startswith("scrypt$n=1024,p=1,r=8$")
+    assert decoded.algorithm == "scrypt"
+    assert user.mnemonic_salt is None
+    assert user.check_mnemonic_phrase(PHRASE) is True
+    assert user.check_mnemonic_phrase(PHRASE.replace("alpha", "wrong")) is False
+
+
+def test_recovery_form_rejects_invalid_bip39_phrases_before_hashing():
+    phrase = " ".join(["abandon"] * 23 + ["art"])
+
+    valid = MnemonicResetForm(data={"username": "member", "mnemonic_phrase": f"  {phrase.upper()}\n"})
+    assert valid.is_valid()
+    assert valid.cleaned_data["mnemonic_phrase"] == phrase
+
+    bad_checksum = " ".join(["abandon"] * 24)
+    typo = " ".join(["abandn"] * 23 + ["art"])
+    for bad in (bad_checksum, typo, PHRASE):
+        form = MnemonicResetForm(data={"username": "member", "mnemonic_phrase": bad})
+        assert not form.is_valid()
+    bip39_checksum_validator(mnemonic_generator.generate(strength=256))
+
+
+def test_sliding_window_throttle_counts_failures_per_identity():
+    throttle = SlidingWindowThrottle(
+        "test",
+        rules={"user": ThrottleRule(limit=2, window=60), "subnet": ThrottleRule(limit=3, window=60)},
+    )
+    request = RequestFactory().post("/", REMOTE_ADDR="203.0.113.7")
+    neighbour = RequestFactory().post("/", REMOTE_ADDR="203.0.113.99")
+    now = 1_200_000.0
+
+    throttle.hit(request, "Alice", now=now)
+    assert not throttle.is_limited(request, "alice", now=now)
+    throttle.hit(request, "alice", now=now)
+    assert throttle.is_limited(request, "alice", now=now)
+    # The whole previous window overlaps right after the rollover, half of it 30s later.
+    assert throttle.is_limited(request, "alice", now=now + 60)
+    assert not throttle.is_limited(request, "alice", now=now + 90)
+
+    throttle.reset("ALICE", now=now)
+    assert not throttle.is_limited(request, "alice", now=now)
+
+    throttle.hit(neighbour, "bob", now=now)
+    assert throttle.is_limited(request, "carol", now=now)
+
+
+def test_client_ip_ignores_forwarded_for_entries_added_by_the_client():
+    spoofed = RequestFactory().post("/", REMOTE_ADDR="10.0.0.2", HTTP_X_FORWARDED_FOR="198.51.100.1, 203.0.113.7")
+
+    assert get_client_ip(spoofed) == "10.0.0.2"
+    with override_settings(TRUSTED_PROXY_COUNT=1):
+        assert get_client_ip(spoofed) == "203.0.113.7"
+    with override_settings(TRUSTED_PROXY_COUNT=3):
+        assert get_client_ip(spoofed) == "10.0.0.2"
+
+
+def test_client_ip_warns_once_about_forwarded_for_without_trusted_proxies(caplog, monkeypatch):
+    monkeypatch.setattr("accounts.utils._warned_untrusted_proxy", False)
+    proxied = RequestFactory().get("/", REMOTE_ADDR="10.0.0.2", HTTP_X_FORWARDED_FOR="203.0.113.7")
+
+    with caplog.at_level(logging.WARNING, logger="accounts.utils"):
+        get_client_ip(RequestFactory().get("/"))
+        assert caplog.records == []
+        get_client_ip(proxied)
+        get_client_ip(proxied)
+    assert [record.getMessage().split(";")[0] for record in caplog.records] == [
+        "X-Forwarded-For is ignored because TRUSTED_PROXY_COUNT is 0"
+    ]
+
+
+def test_session_heartbeats_are_buffered_and_flushed_in_bulk(db):
+    User = get_user_model()
+    user = User.objects.create_user(username="watcher", password="secret1234")
+    first = ActiveSession.objects.create(user=user, session_key="first")
+    second = ActiveSession.objects.create(user=user, session_key="second")
+    seen_at = timezone.now() + timedelta(minutes=5)
+
+    buffer = HeartbeatBuffer(interval=60)
+    assert buffer.record("first", seen_at) is True
+    assert buffer.record("first", seen_at + timedelta(seconds=1)) is False
+    assert buffer.record("second", seen_at) is True
+
+    assert flush_heartbeats(buffer) == 2
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.last_seen == seen_at
+    assert second.last_seen == seen_at
+    assert flush_heartbeats(buffer) == 0
+
+
+def test_login_deactivates_sessions_beyond_limit(db):
+    User = get_user_model()
+    user = User.objects.create_user(username="roamer", password="secret1234", session_limit=2)
+    now = timezone.now()
+    for index in range(3):
+        ActiveSession.objects.create(user=user, session_key=f"old-{index}")
+    for index in range(3):
+        ActiveSession.objects.filter(session_key=f"old-{index}").update(last_seen=now - timedelta(hours=index + 1))
+
+    request = RequestFactory().get("/")
+    SessionMiddleware(lambda request: None).process_request(request)
+    user_logged_in.send(sender=User, request=request, user=user)
+
+    active = set(user.sessions.filter(is_active=True).values_list("session_key", flat=True))
+    assert active == {request.session.session_key, "old-0"}
+
+
+def test_terminated_session_is_flushed_by_revocation_middleware(db):
+    User = get_user_model()
+    user = User.objects.create_user(username="revoked", password="secret1234")
+    request = RequestFactory().get("/")
+    SessionMiddleware(lambda request: None).process_request(request)
+    request.session["marker"] = True
+    request.session.save()
+    session_key = request.session.session_key
+    session = ActiveSession.objects.create(user=user, session_key=session_key)
+
+    middleware = SessionRevocationMiddleware(lambda request: request.session.get("marker"))
+    revocation_list.clear()
+    assert middleware(_request_with_session(session_key)) is True
+
+    session.terminate()
+    assert middleware(_request_with_session(session_key)) is None
+    assert revocation_list.is_revoked(session_key)
+
+
+def _request_with_session(session_key):
+    request = RequestFactory().get("/")
+    request.COOKIES[settings.SESSION_COOKIE_NAME] = session_key
+    SessionMiddleware(lambda request: None).process_request(request)
+    return request
+
+
+@override_settings(SESSION_COOKIE_SECURE=False)
+def test_session_list_is_served_from_the_session_index(client, db):
+    cache.clear()
+    User = get_user_model()
+    User.objects.create_user(username="indexed", password="correct horse battery")
+
+    client.post("/accounts/login/", {"username": "indexed", "password": "correct horse battery"})
+    session_key = client.session.session_key
+    user = User.objects.get(username="indexed")
+    assert [session["session_key"] for session in session_index.list(user.pk)] == [session_key]
+
+    response = client.get("/accounts/sessions/")
+    assert [session["session_key"] for session in response.context["sessions"]] == [session_key]
+
+    client.post("/accounts/logout/")
+    assert session_index.list(user.pk) == []
+
+
+@override_settings(SESSION_COOKIE_SECURE=False)
+def test_registration_logs_the_new_user_in(client, db):
+    password = "correct horse battery"
+    response = client.post(
+        "/accounts/register/",
+        {
+            "username": "newcomer",
+            "preferred_channel": "telegram",
+            "telegram_username": "newcomer",
+            "password1": password,
+            "password2": password,
+        },
+    )
+
+    assert response.status_code == 200
+    assert len(response.context["mnemonic_phrase"].split()) == 24
+    user = get_user_model().objects.get(username="newcomer")
+    assert client.session["_auth_user_id"] == str(user.pk)
+    assert client.session["_auth_user_backend"] == "accounts.backends.CachedModelBackend"
+
+
+def test_cached_backend_skips_user_query_until_the_user_changes(db, django_assert_num_queries):
+    User = get_user_model()
+    user = User.objects.create_user(username="cached", password="secret1234")
+    user.set_mnemonic_phrase(PHRASE)
+    user.save()
+    backend = CachedModelBackend()
+
+    assert backend.get_user(user.pk) == user
+    with django_assert_num_queries(0):
+        cached = backend.get_user(user.pk)
+        assert cached.username == "cached"
+        assert cached.get_session_auth_hash() == user.get_session_auth_hash()
+    with django_assert_num_queries(1):
+        assert cached.mnemonic_hash == user.mnemonic_hash
+
+    user.is_active = False
+    user.save(update_fields=["is_active"])
+    assert backend.get_user(user.pk) is None
+
+
+def test_pbkdf2_password_is_upgraded_to_scrypt_on_login(db):
+    User = get_user_model()
+    user = User.objects.create_user(username="upgrader", password="unused")
+    user.password = make_password("correct horse battery", hasher="pbkdf2_sha256")
+    user.save(update_fields=["password"])
+
+    assert authenticate(username="upgrader", password="correct horse battery") == user
+
+    user.refresh_from_db()
+    assert user.password.startswith(f"scrypt${settings.PASSWORD_SCRYPT_WORK_FACTOR}$")
+    assert user.check_password("correct horse battery")
+
+
+def test_recovery_sessions_are_expired_and_purged_in_batches(db):
+    User = get_user_model()
+    user = User.objects.create_user(username="sweeper", password="secret1234")
+    now = timezone.now()
+    for _ in range(5):
+        RecoverySession.objects.create(user=user, expires_at=now - timedelta(minutes=1))
+    live = RecoverySession.objects.create(user=user, expires_at=now + timedelta(minutes=10))
+    old = RecoverySession.objects.create(
+        user=user,
+        created_at=now - timedelta(days=40),
+        expires_at=now - timedelta(days=40),
+        status=RecoverySession.Status.VERIFIED,
+    )
+
+    assert expire_recovery_sessions(batch_size=2) == 5
+    assert RecoverySession.objects.filter(status=RecoverySession.Status.EXPIRED).count() == 5
+    assert RecoverySession.objects.get(pk=live.pk).is_active()
+
+    assert purge_recovery_sessions(timedelta(days=30), batch_size=2) == 1
+    assert not RecoverySession.objects.filter(pk=old.pk).exists()
+    assert RecoverySession.objects.count() == 6
+
+
+@override_settings(MNEMONIC_HASH_ALGORITHM="scrypt", MNEMONIC_HASH_PARAMS={"scrypt": {"n": 1024, "r": 8, "p": 1}})
+def test_provision_users_inserts_new_users_in_batches_and_skips_known_ones(db, tmp_path, django_assert_num_queries):
+    User = get_user_model()
+    User.objects.create_user(username="carol")
+    source = tmp_path / "users.jsonl"
+    source.write_text(
+        "\n".join(
+            json.dumps(row)
+            for row in [
+                {"username": "alice", "password": "alice-password", "telegram_username": "alice_tg"},
+                {"username": "bob"},
+                {"username": "bob"},
+                {"username": "carol"},
+                {"username": "dave", "preferred_channel": User.NotificationChannel.JABBER},
+            ]
+        )
+    )
+    output = tmp_path / "phrases.csv"
+    options = {"output": output, "batch_size": 2, "workers": 1, "stdout": io.StringIO(), "stderr": io.StringIO()}
+
+    # Per batch: one lookup of existing usernames, plus one bulk insert when anything is new.
+    with django_assert_num_queries(5):
+        call_command("provision_users", source, **options)
+
+    rows = list(csv.DictReader(output.open()))
+    assert [row["username"] for row in rows] == ["alice", "bob", "dave"]
+    alice = User.objects.get(username="alice")
+    assert alice.check_password("alice-password")
+    assert alice.check_mnemonic_phrase(rows[0]["mnemonic_phrase"])
+    assert alice.telegram_username == "alice_tg"
+    assert not User.objects.get(username="bob").has_usable_password()
+    assert User.objects.get(username="dave").preferred_channel == User.NotificationChannel.JABBER
+
+    with django_assert_num_queries(3):
+        call_command("provision_users", source, **options)
+    assert User.objects.count() == 4
+    assert list(csv.DictReader(output.open())) == []
+
+
+def test_account_deletion_job_runs_in_checkpointed_chunks(db):
+    cache.clear()
+    User = get_user_model()
+    user = User.objects.create_user(username="leaving", password="password123", telegram_username="leaving_t")
+    account = WalletAccount.objects.create(user=user, currency=Currency.objects.create(code="BTC", name="Bitcoin"))
+    for index in range(5):
+        ActiveSession.objects.create(user=user, session_key=f"leaving-{index}")
+        NotificationLog.objects.create(user=user, channel=NotificationTemplate.Channel.TELEGRAM)
+    AuthEvent.objects.create(kind=AuthEvent.Kind.LOGIN, user=user, username="leaving", ip_address="203.0.113.7")
+    AuthEvent.objects.create(kind=AuthEvent.Kind.LOGIN_FAILED, username="leaving", user_agent="curl/8.0")
+
+    job = schedule_account_deletion(user)
+    user.refresh_from_db()
+    assert not user.is_active
+
+    assert run_account_deletion(job.pk, batch_size=2, max_chunks=5) is False
+    job.refresh_from_db()
+    assert job.stage == "auth_events"
+    assert job.progress == {"sessions": 5, "auth_events": 2}
+    assert all(revocation_list.is_revoked(f"leaving-{index}") for index in range(5))
+
+    assert run_account_deletion(job.pk, batch_size=2) is True
+    job.refresh_from_db()
+    user.refresh_from_db()
+    assert job.status == AccountDeletionJob.Status.COMPLETED
+    assert job.progress["notification_logs"] == 5
+    assert (user.username, user.telegram_username, user.has_usable_password()) == (f"deleted-{user.pk}", "", False)
+    assert not ActiveSession.objects.filter(user=user).exists()
+    assert WalletAccount.objects.filter(pk=account.pk, user=user).exists()
+    # The security log keeps the events, without anything that identifies the user.
+    assert sorted(AuthEvent.objects.values_list("kind", "user", "username", "ip_address", "user_agent")) == [
+        (AuthEvent.Kind.LOGIN, None, "", None, ""),
+        (AuthEvent.Kind.LOGIN_FAILED, None, "", None, ""),
+    ]
+
+
+def test_staff_user_search_matches_handles_by_prefix(client, db):
+    User = get_user_model()
+    staff = User.objects.create_user(username="operator", password="password123", is_staff=True)
+    User.objects.create_user(username="carol", password="password123", telegram_username="carol_tg")
+    User.objects.create_user(username="dave", password="password123", xmpp_address="carolina@jabber.example")
+    User.objects.create_user(username="erin", password="password123")
+
+    client.force_login(staff)
+    response = client.get("/adminpanel/users/search/", {"q": "@Carol"})
+    assert [row["username"] for row in response.json()["results"]] == ["carol", "dave"]
+
+
+def test_admin_user_search_keeps_the_search_ranking(admin_client):
+    User = get_user_model()
+    User.objects.create_user(username="carolina")
+    User.objects.create_user(username="zed", telegram_username="Carol")
+    User.objects.create_user(username="bob")
+
+    response = admin_client.get("/admin/accounts/user/", {"q": "carol"})
+    assert [user.username for user in response.context["cl"].result_list] == ["zed", "carolina"]
+    response = admin_client.get("/admin/accounts/user/")
+    assert [user.username for user in response.context["cl"].result_list] == ["admin", "bob", "carolina", "zed"]
+
+
+def test_otp_step_verifies_signed_challenge_without_sessions(client, db):
+    cache.clear()
+    User = get_user_model()
+    user = User.objects.create_user(username="recovering", password="old-password")
+    recovery = RecoverySession.objects.create(user=user, expires_at=timezone.now() + timedelta(minutes=15))
+    token = issue_challenge(user.pk, recovery.pk, "123456")
+    client.cookies[CHALLENGE_COOKIE] = token
+    passwords = {"new_password1": "n3w-Passw0rd!", "new_password2": "n3w-Passw0rd!"}
+
+    response = client.post("/accounts/recovery/verify/", {"otp_code": "654321", **passwords})
+    assert response.status_code == 200
+    response = client.post("/accounts/recovery/verify/", {"otp_code": "123456", **passwords})
+    assert response.status_code == 302
+    assert settings.SESSION_COOKIE_NAME not in response.cookies
+
+    user.refresh_from_db()
+    recovery.refresh_from_db()
+    assert user.check_password("n3w-Passw0rd!")
+    assert (recovery.status, recovery.otp_confirmed) == (RecoverySession.Status.VERIFIED, True)
+
+    # The challenge is single-use even if the browser replays the old token.
+    client.cookies[CHALLENGE_COOKIE] = token
+    assert client.get("/accounts/recovery/verify/")["Location"] == "/accounts/recovery/"
+
+
+def test_recovery_code_is_sent_but_never_stored_or_logged(db, caplog, monkeypatch):
+    User = get_user_model()
+    user = User.objects.create_user(
+        username="rec", preferred_channel=User.NotificationChannel.JABBER, xmpp_address="rec@example.org"
+    )
+    cache.clear()
+    monkeypatch.setattr(RecoveryOrchestrator, "_issue_one_time_code", lambda self: "608442")
+    sent = []
+    send_jabber = NotificationDispatchService._send_jabber
+
+    def record_and_send(self, user, message):
+        sent.append(message)
+        send_jabber(self, user, message)
+
+    monkeypatch.setattr(NotificationDispatchService, "_send_jabber", record_and_send)
+
+    with caplog.at_level(logging.DEBUG):
+        RecoveryOrchestrator().initiate_session(user)
+
+    assert sent == [
+        f"Your password reset code is 608442. It expires in {settings.RECOVERY_CHALLENGE_TTL // 60} minutes."
+    ]
+    log = NotificationLog.objects.get(user=user)
+    assert log.status == NotificationLog.Status.SENT
+    assert log.payload["otp"] != "608442"
+    assert "608442" not in json.dumps(list(NotificationLog.objects.values()), default=str)
+    assert "608442" not in caplog.text
+
+
+def test_auth_events_are_queued_and_written_in_batches(client, db):
+    cache.clear()
+    auth_events.clear()
+    User = get_user_model()
+    User.objects.create_user(username="audited", password="password123")
+
+    client.post("/accounts/login/", {"username": "audited", "password": "wrong-password"})
+    client.post("/accounts/login/", {"username": "audited", "password": "password123"})
+    assert len(auth_events) == 2
+    assert auth_events.flush() == 2
+    assert list(AuthEvent.objects.order_by("pk").values_list("kind", "username")) == [
+        (AuthEvent.Kind.LOGIN_FAILED, "audited"),
+        (AuthEvent.Kind.LOGIN, "audited"),
+    ]
+
+    queue = AuthEventQueue(batch_size=3, flush_interval=60)
+    for _ in range(2):
+        queue.record(AuthEvent.Kind.LOGOUT, username="audited")
+    assert queue.flush_if_due() == 0
+    queue.record(AuthEvent.Kind.LOGOUT, username="audited")
+    assert len(queue) == 0
+    assert AuthEvent.objects.filter(kind=AuthEvent.Kind.LOGOUT).count() == 3
+
+    event = AuthEvent.objects.first()
+    with pytest.raises(ValueError):
+        event.save()
+
+
+def test_auth_events_of_a_deleted_user_do_not_drop_the_batch(transactional_db):
+    # Foreign keys are checked on commit, so the queue must write outside a test transaction.
+    User = get_user_model()
+    kept = User.objects.create_user(username="kept")
+    deleted = User.objects.create_user(username="deleted")
+    queue = AuthEventQueue(batch_size=10, flush_interval=60)
+    queue.record(AuthEvent.Kind.LOGIN, user=kept)
+    queue.record(AuthEvent.Kind.LOGIN_FAILED, user_id=deleted.pk, username="deleted")
+    queue.record(AuthEvent.Kind.RECOVERY_FAILED, username="stranger")
+    deleted.delete()
+
+    assert queue.flush() == 3
+    assert list(AuthEvent.objects.order_by("pk").values_list("username", "user_id")) == [
+        ("kept", kept.pk),
+        ("deleted", None),
+        ("stranger", None),
+    ]
@@ -0,0 +1,110 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from notifications.forms import NotificationPreferencesForm
+from notifications.models import NotificationPreference, NotificationTemplate
+from notifications.preferences import get_channel_map
+from notifications.telegram import TelegramUpdateConsumer
+
+
+def test_channel_preferences_default_to_enabled_and_are_cached(db, django_assert_num_queries):
+    cache.clear()
+    user = get_user_model().objects.create_user(username="prefs", password="password123")
+    assert not NotificationPreference.objects.filter(user=user).exists()
+
+    assert all(get_channel_map(user.pk).values())
+    with django_assert_num_queries(0):
+        get_channel_map(user.pk)
+
+    form = NotificationPreferencesForm(
+        {f"channel_{NotificationTemplate.Channel.JABBER}": "on"},
+        user=user,
+    )
+    assert form.is_valid()
+    form.save()
+
+    disabled = {pref.channel for pref in NotificationPreference.objects.filter(user=user)}
+    channel_map = get_channel_map(user.pk)
+    assert NotificationTemplate.Channel.JABBER not in disabled
+    assert disabled == {channel for channel, enabled in channel_map.items() if not enabled}
+
+
+class FakeBotAPI(ThreadingHTTPServer):
+    """Minimal Bot API serving queued getUpdates batches."""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.offsets = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                query = parse_qs(urlparse(handler.path).query)
+                self.offsets.append(query.get("offset", [None])[0])
+                result = self.batches.pop(0) if self.batches else []
+                body = json.dumps({"ok": True, "result": result}).encode()
+                handler.send_response(200)
+                handler.send_header("Content-Type", "application/json")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+
+
+def _private_message(update_id, chat_id, username):
+    chat = {"id": chat_id, "type": "private", "username": username}
+    return {"update_id": update_id, "message": {"message_id": update_id, "chat": chat, "text": "/start"}}
+
+
+def test_telegram_consumer_resolves_chat_ids_in_one_update_per_batch(db, django_assert_num_queries):
+    cache.clear()
+    User = get_user_model()
+    alice = User.objects.create_user(username="alice", password="password123", telegram_username="Alice_T")
+    bob = User.objects.create_user(username="bob", password="password123", telegram_username="bob_t")
+    # An abandoned account that resolved the same handle before it changed hands.
+    previous = User.objects.create_user(
+        username="previous", telegram_username="BOB_T", telegram_chat_id="999", telegram_verified=True
+    )
+
+    server = FakeBotAPI(
+        [
+            [
+                _private_message(10, 111, "alice_t"),
+                _private_message(11, 222, "bob_t"),
+                _private_message(12, 333, "stranger"),
+                {"update_id": 13, "message": {"chat": {"id": -5, "type": "group", "title": "x"}}},
+            ],
+        ]
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        consumer = TelegramUpdateConsumer(
+            token="TEST", api_base_url=f"http://127.0.0.1:{server.server_port}", poll_timeout=0
+        )
+        # One lookup of the senders' accounts and one UPDATE for all of them.
+        with django_assert_num_queries(2) as queries:
+            result = consumer.poll_once()
+        assert consumer.run(stop_when_idle=True) == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert (result.updates, result.senders, result.resolved) == (4, 3, 2)
+    assert sum(query["sql"].startswith("UPDATE") for query in queries.captured_queries) == 1
+    assert server.offsets == [None, "14"]
+
+    alice.refresh_from_db()
+    bob.refresh_from_db()
+    assert (alice.telegram_chat_id, alice.telegram_verified) == ("111", True)
+    assert (bob.telegram_chat_id, bob.telegram_verified) == ("222", True)
+    previous.refresh_from_db()
+    assert previous.telegram_chat_id == "999"
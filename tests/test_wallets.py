@@ -0,0 +1,332 @@
+import json
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from wallets.addresses import address_resolver
+from wallets.models import (
+    Currency,
+    DepositAddress,
+    LedgerEntry,
+    NodeConfiguration,
+    ScanCheckpoint,
+    WalletAccount,
+    WalletTransaction,
+)
+from wallets import polling
+from wallets.polling import poll_all_currencies
+from wallets.services import JsonRpcClient, NodeClientError, RpcCall, WalletService
+
+
+class FakeNode(ThreadingHTTPServer):
+    """JSON-RPC endpoint answering from a ``method -> handler`` map."""
+
+    daemon_threads = True
+
+    def __init__(self, methods):
+        self.methods = methods
+        self.calls = []
+        self.client_ports = set()
+        self.failures = {}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(handler):
+                payload = json.loads(handler.rfile.read(int(handler.headers["Content-Length"])))
+                self.client_ports.add(handler.client_address[1])
+                self.calls.append(payload)
+                method = payload[0]["method"] if isinstance(payload, list) else payload["method"]
+                if self.failures.get(method):
+                    self.failures[method] -= 1
+                    return handler._reply(503, b"unavailable")
+                if isinstance(payload, list):
+                    body = [self._answer(call) for call in payload]
+                else:
+                    body = self._answer(payload)
+                handler._reply(200, json.dumps(body).encode())
+
+            def _reply(handler, status, body):
+                handler.send_response(status)
+                handler.send_header("Content-Type", "application/json")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+
+    def _answer(self, call):
+        handler = self.methods.get(call["method"])
+        if handler is None:
+            return {"id": call["id"], "result": None, "error": {"code": -32601, "message": "Method not found"}}
+        try:
+            return {"id": call["id"], "result": handler(*call["params"]), "error": None}
+        except ValueError as exc:
+            return {"id": call["id"], "result": None, "error": {"code": -8, "message": str(exc)}}
+
+
+@pytest.fixture
+def fake_node(db):
+    servers = []
+    address_resolver.clear()
+
+    def start(methods, code="BTC"):
+        server = FakeNode(methods)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        currency = Currency.objects.create(code=code, name=code)
+        node = NodeConfiguration.objects.create(
+            currency=currency,
+            rpc_url=f"http://127.0.0.1:{server.server_port}/",
+            connect_timeout=1,
+            read_timeout=2,
+        )
+        return server, node
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_rpc_client_reuses_connections_and_retries_idempotent_calls(fake_node):
+    server, node = fake_node({"getbalance": lambda: 1.5, "getnewaddress": lambda label: f"addr-{label}"})
+    client = JsonRpcClient(node)
+
+    for _ in range(5):
+        assert str(client.get_balance()) == "1.5"
+    assert len(server.client_ports) == 1
+
+    server.failures["getbalance"] = 2
+    assert str(client.get_balance()) == "1.5"
+
+    server.failures["getnewaddress"] = 1
+    with pytest.raises(NodeClientError):
+        client._post("getnewaddress", ["user_1"])
+    assert [call["method"] for call in server.calls].count("getnewaddress") == 1
+
+
+def test_batch_calls_share_one_request_and_fail_independently(fake_node):
+    received = {"addr-a": 0.5}
+
+    def getreceivedbyaddress(address):
+        if address not in received:
+            raise ValueError("Invalid address")
+        return received[address]
+
+    server, node = fake_node({"getreceivedbyaddress": getreceivedbyaddress})
+    client = JsonRpcClient(node)
+
+    results = client.batch([RpcCall("getreceivedbyaddress", [address]) for address in ("addr-a", "bogus")])
+    assert [result.ok for result in results] == [True, False]
+    assert results[0].result == 0.5
+    assert len(server.calls) == 1
+    assert len({call["id"] for call in server.calls[0]}) == 2
+
+
+def test_deposit_addresses_are_pregenerated_in_one_batch(fake_node):
+    User = get_user_model()
+    server, node = fake_node({"getnewaddress": lambda label: f"addr-{label}"})
+    accounts = [
+        WalletAccount.objects.create(user=User.objects.create_user(username=f"holder{index}"), currency=node.currency)
+        for index in range(3)
+    ]
+
+    assert WalletService().pregenerate_deposit_addresses(node.currency) == 3
+    assert WalletService().pregenerate_deposit_addresses(node.currency) == 0
+    assert len(server.calls) == 1
+    assert set(DepositAddress.objects.values_list("address", flat=True)) == {
+        f"addr-user_{account.user_id}" for account in accounts
+    }
+
+    # The node hands back an address the account already has: nothing new is stored.
+    DepositAddress.objects.filter(account=accounts[0]).update(is_active=False)
+    assert WalletService().pregenerate_deposit_addresses(node.currency) == 0
+    assert DepositAddress.objects.count() == 3
+
+
+def test_poll_fans_out_per_currency_and_checkpoints_each_scan(fake_node):
+    def btc_since(*cursor):
+        transactions = [] if cursor else [{"category": "receive", "address": "btc-1", "amount": 0.25, "txid": "t1"}]
+        return {"transactions": transactions, "removed": [], "lastblock": "block-1"}
+
+    def slow_since(*cursor):
+        time.sleep(1.5)
+        return {"transactions": [], "removed": [], "lastblock": "block-1"}
+
+    User = get_user_model()
+    btc_server, btc_node = fake_node({"listsinceblock": btc_since}, code="BTC")
+    _, xmr_node = fake_node({"listsinceblock": slow_since}, code="XMR")
+    NodeConfiguration.objects.filter(pk=xmr_node.pk).update(connect_timeout=0.2, read_timeout=0.3, max_retries=0)
+
+    account = WalletAccount.objects.create(user=User.objects.create_user(username="poller"), currency=btc_node.currency)
+    DepositAddress.objects.create(account=account, address="btc-1")
+
+    reports = {report.currency: report for report in poll_all_currencies()}
+
+    assert (reports["BTC"].error, reports["BTC"].credited) == (None, 1)
+    assert "timed out" in reports["XMR"].error and reports["XMR"].credited == 0
+    account.refresh_from_db()
+    assert str(account.balance.normalize()) == "0.25"
+
+    checkpoint = ScanCheckpoint.objects.get(currency=btc_node.currency)
+    assert (checkpoint.block_hash, checkpoint.transactions_scanned) == ("block-1", 1)
+    assert not ScanCheckpoint.objects.filter(currency=xmr_node.currency).exists()
+
+    xmr_node.currency.is_active = False
+    xmr_node.currency.save()
+    poll_all_currencies()
+    assert btc_server.calls[-1]["params"] == ["block-1"]
+    account.refresh_from_db()
+    assert str(account.balance.normalize()) == "0.25"
+
+
+def test_rescanned_deposits_are_credited_once(fake_node, monkeypatch):
+    # The two outputs of t1 land in different slices.
+    monkeypatch.setattr(polling, "SCAN_PAGE_SIZE", 2)
+    history = [
+        {"category": "receive", "address": "btc-1", "amount": 1, "txid": "t2"},
+        {"category": "receive", "address": "btc-1", "amount": 0.5, "txid": "t1"},
+        {"category": "receive", "address": "btc-2", "amount": 0.25, "txid": "t1"},
+        {"category": "send", "address": "btc-1", "amount": -1, "txid": "t3"},
+    ]
+    _, node = fake_node({"listsinceblock": lambda *cursor: {"transactions": history, "lastblock": "block-2"}})
+    user = get_user_model().objects.create_user(username="rescan")
+    account = WalletAccount.objects.create(user=user, currency=node.currency)
+    DepositAddress.objects.bulk_create(
+        [DepositAddress(account=account, address="btc-1"), DepositAddress(account=account, address="btc-2")]
+    )
+
+    assert poll_all_currencies()[0].credited == 2
+    ScanCheckpoint.objects.filter(currency=node.currency).delete()
+    assert poll_all_currencies()[0].credited == 0
+
+    account.refresh_from_db()
+    assert str(account.balance.normalize()) == str(account.available_balance.normalize()) == "1.75"
+    assert WalletService().record_deposit(account, Decimal("9"), "t2").amount == Decimal("1")
+    assert account.transactions.count() == 2
+
+
+def test_addresses_resolve_per_page_and_reload_after_new_ones(
+    fake_node, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    cache.clear()
+    User = get_user_model()
+    _, node = fake_node({"getnewaddress": lambda label: "btc-new"})
+    user = User.objects.create_user(username="resolver")
+    account = WalletAccount.objects.create(user=user, currency=node.currency)
+    DepositAddress.objects.create(account=account, address="btc-1")
+
+    with django_assert_num_queries(1):
+        owners = address_resolver.resolve(node.currency.pk, ["btc-1", "btc-new", "btc-1"])
+    assert owners == {"btc-1": (account.pk,), "btc-new": ()}
+    with django_assert_num_queries(0):
+        address_resolver.resolve(node.currency.pk, ["btc-1", "btc-new"])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        WalletService().generate_deposit_address(account)
+    assert address_resolver.resolve(node.currency.pk, ["btc-new"]) == {"btc-new": (account.pk,)}
+
+    # Edits made outside the wallet service, e.g. in the admin, invalidate too.
+    other = WalletAccount.objects.create(user=User.objects.create_user(username="other"), currency=node.currency)
+    address = DepositAddress.objects.get(address="btc-1")
+    address.account = other
+    with django_capture_on_commit_callbacks(execute=True):
+        address.save()
+    assert address_resolver.resolve(node.currency.pk, ["btc-1"]) == {"btc-1": (other.pk,)}
+    with django_capture_on_commit_callbacks(execute=True):
+        address.delete()
+    assert address_resolver.resolve(node.currency.pk, ["btc-1"]) == {"btc-1": ()}
+
+
+def test_post_many_applies_net_balances_or_nothing(db):
+    User = get_user_model()
+    currency = Currency.objects.create(code="LTC", name="Litecoin")
+    first, second = (
+        WalletAccount.objects.create(user=User.objects.create_user(username=f"ledger-{index}"), currency=currency)
+        for index in range(2)
+    )
+    credit, debit = WalletTransaction.Direction.CREDIT, WalletTransaction.Direction.DEBIT
+
+    rows = WalletTransaction.post_many(
+        [
+            LedgerEntry(second, Decimal("5"), credit, "airdrop"),
+            LedgerEntry(first, Decimal("2"), credit, "refund"),
+            LedgerEntry(second, Decimal("3"), debit, "payout"),
+        ]
+    )
+    assert [row.reference for row in rows] == ["airdrop", "refund", "payout"]
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.balance, second.balance, second.available_balance) == (Decimal("2"), Decimal("2"), Decimal("2"))
+
+    # The payout precedes the credit that would fund it, so the whole batch is rejected.
+    with pytest.raises(ValueError):
+        WalletTransaction.post_many(
+            [
+                LedgerEntry(first, Decimal("1"), credit),
+                LedgerEntry(second, Decimal("4"), debit),
+                LedgerEntry(second, Decimal("9"), credit),
+            ]
+        )
+    first.refresh_from_db()
+    assert first.balance == Decimal("2")
+    assert WalletTransaction.objects.count() == 3
+
+
+def test_deposits_removed_by_a_reorg_are_reversed_until_mined_again(fake_node):
+    t1 = {"category": "receive", "address": "btc-1", "amount": 1, "txid": "t1"}
+    t2 = {"category": "receive", "address": "btc-1", "amount": 2, "txid": "t2"}
+    scans = {
+        (): {"transactions": [t1, t2], "removed": [], "lastblock": "block-1"},
+        ("block-1",): {"transactions": [], "removed": [t1], "lastblock": "block-2"},
+        ("block-2",): {"transactions": [t1], "removed": [], "lastblock": "block-3"},
+    }
+    _, node = fake_node({"listsinceblock": lambda *cursor: scans[cursor]})
+    user = get_user_model().objects.create_user(username="reorged")
+    account = WalletAccount.objects.create(user=user, currency=node.currency)
+    DepositAddress.objects.create(account=account, address="btc-1")
+
+    def poll():
+        report = poll_all_currencies()[0]
+        account.refresh_from_db()
+        return report.credited, report.reorged, account.balance
+
+    assert poll() == (2, 0, Decimal("3"))
+    assert poll() == (0, 1, Decimal("2"))
+    assert account.transactions.get(reference="t1").status == WalletTransaction.Status.CANCELLED
+    assert poll() == (1, 0, Decimal("3"))
+    assert account.transactions.get(reference="t1").status == WalletTransaction.Status.CONFIRMED
+
+
+def test_ingest_restores_only_the_reported_account_and_txid_pairs(db):
+    currency = Currency.objects.create(code="DOGE", name="Dogecoin")
+    first, second = (
+        WalletAccount.objects.create(user=get_user_model().objects.create_user(username=f"crossed-{index}"), currency=currency)
+        for index in range(2)
+    )
+    # first once received t2 too, but a reorg reversed it and this scan only reports it for second.
+    WalletTransaction.objects.create(
+        account=first,
+        amount=Decimal("7"),
+        direction=WalletTransaction.Direction.CREDIT,
+        status=WalletTransaction.Status.CANCELLED,
+        reference="t2",
+        metadata={"type": "deposit"},
+    )
+
+    assert WalletTransaction.ingest_deposits([(first.pk, "t1", Decimal("1")), (second.pk, "t2", Decimal("2"))]) == 2
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.balance, second.balance) == (Decimal("1"), Decimal("2"))
+    assert first.transactions.get(reference="t2").status == WalletTransaction.Status.CANCELLED
@@ -0,0 +1,90 @@
+"""Deposit address to account resolution for node transactions.
+
+Polling resolves every address in a page of node transactions with one
+``IN`` query on the indexed ``DepositAddress.address`` column. Answers,
+including "not ours" for change outputs and foreign addresses, are kept in
+a per-process LRU keyed by ``(currency_id, address)``. Saving or deleting a
+``DepositAddress`` (see ``signals``) and bulk address generation bump a
+version stored in the shared cache, and every worker drops its LRU the next
+time it sees a new version. A new address is therefore never reported as
+unknown, and a reassigned one never resolves to its old account. Bulk
+``QuerySet.update`` calls on addresses must call
+``invalidate_deposit_addresses`` themselves.
+"""
+
+from __future__ import annotations
+
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import DepositAddress
+
+
+ADDRESS_VERSION_KEY = "wallets:deposit-address-version"
+
+
+class AddressResolver:
+    def __init__(self, maxsize: int | None = None):
+        self.maxsize = settings.DEPOSIT_ADDRESS_CACHE_SIZE if maxsize is None else maxsize
+        self._entries: OrderedDict[tuple[int, str], tuple[int, ...]] = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def resolve(self, currency_id: int, addresses: Iterable[str]) -> dict[str, tuple[int, ...]]:
+        """Map each address to the ids of the currency's accounts that own it."""
+
+        version = cache.get(ADDRESS_VERSION_KEY)
+        resolved: dict[str, tuple[int, ...]] = {}
+        missing: set[str] = set()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            for address in set(addresses):
+                entry = self._entries.get((currency_id, address))
+                if entry is None:
+                    missing.add(address)
+                else:
+                    self._entries.move_to_end((currency_id, address))
+                    resolved[address] = entry
+        if not missing:
+            return resolved
+
+        owners: dict[str, list[int]] = {address: [] for address in missing}
+        for address, account_id in DepositAddress.objects.filter(
+            account__currency_id=currency_id, address__in=missing
+        ).values_list("address", "account_id"):
+            owners[address].append(account_id)
+
+        with self._lock:
+            for address, account_ids in owners.items():
+                resolved[address] = tuple(sorted(set(account_ids)))
+                if self._version == version:
+                    self._entries[(currency_id, address)] = resolved[address]
+                    self._entries.move_to_end((currency_id, address))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return resolved
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+address_resolver = AddressResolver()
+
+
+def invalidate_deposit_addresses() -> None:
+    """Make every worker reload address ownership once the current transaction commits."""
+
+    def bump():
+        cache.set(ADDRESS_VERSION_KEY, secrets.token_hex(8), timeout=None)
+        address_resolver.clear()
+
+    transaction.on_commit(bump)
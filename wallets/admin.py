@@ -4,7 +4,15 @@ from __future__ import annotations
 
 from django.contrib import admin
 
-from .models import Currency, DepositAddress, NodeConfiguration, WalletAccount, WalletBalanceSnapshot, WalletTransaction
+from .models import (
+    Currency,
+    DepositAddress,
+    NodeConfiguration,
+    ScanCheckpoint,
+    WalletAccount,
+    WalletBalanceSnapshot,
+    WalletTransaction,
+)
 
 
 @admin.register(Currency)
@@ -21,6 +29,11 @@ class NodeConfigurationAdmin(admin.ModelAdmin):
     search_fields = ("currency__code", "rpc_url")
 
 
+@admin.register(ScanCheckpoint)
+class ScanCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("currency", "block_hash", "transactions_scanned", "updated_at")
+
+
 @admin.register(WalletAccount)
 class WalletAccountAdmin(admin.ModelAdmin):
     list_display = ("user", "currency", "balance", "available_balance", "created_at")
@@ -0,0 +1,79 @@
+"""Benchmark bulk ledger posting against per-entry ``WalletTransaction.record``."""
+
+from __future__ import annotations
+
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from wallets.models import Currency, LedgerEntry, WalletAccount, WalletTransaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Post the same entries through WalletTransaction.record and WalletTransaction.post_many "
+        "against throwaway accounts and report time and query counts. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=1000, help="Ledger entries per run.")
+        parser.add_argument("--accounts", type=int, default=10, help="Accounts the entries are spread over.")
+
+    def handle(self, *args, **options):
+        entries, accounts = options["entries"], options["accounts"]
+        if entries < 1 or accounts < 1:
+            raise CommandError("--entries and --accounts must be at least 1")
+
+        results = {}
+        for label, post in (("record", self._post_each), ("post_many", WalletTransaction.post_many)):
+            with transaction.atomic():
+                batch = self._entries(entries, accounts)
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    post(batch)
+                    elapsed = time.perf_counter() - started
+                results[label] = elapsed
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f"{label}: {elapsed * 1000:.1f} ms, {len(queries)} queries, "
+                f"{entries / elapsed:.0f} entries/s"
+            )
+
+        speedup = results["record"] / results["post_many"]
+        self.stdout.write(self.style.SUCCESS(f"post_many is {speedup:.1f}x faster for {entries} entries"))
+
+    @staticmethod
+    def _post_each(batch: list[LedgerEntry]) -> None:
+        for entry in batch:
+            WalletTransaction.record(
+                account=entry.account,
+                amount=entry.amount,
+                direction=entry.direction,
+                reference=entry.reference,
+                metadata=entry.metadata,
+            )
+
+    @staticmethod
+    def _entries(count: int, accounts: int) -> list[LedgerEntry]:
+        User = get_user_model()
+        currency = Currency.objects.create(code="__BENCH__", name="Benchmark", is_active=False)
+        wallets = [
+            WalletAccount.objects.create(
+                user=User.objects.create_user(username=f"__benchmark_ledger_{index}__"), currency=currency
+            )
+            for index in range(accounts)
+        ]
+        # Entries come in credit, credit, payout triples per account, so every debit is funded.
+        return [
+            LedgerEntry(
+                account=wallets[index // 3 % accounts],
+                amount=Decimal("0.5") if index % 3 == 2 else Decimal("1.5"),
+                direction=WalletTransaction.Direction.DEBIT if index % 3 == 2 else WalletTransaction.Direction.CREDIT,
+                reference=f"benchmark:{index}",
+            )
+            for index in range(count)
+        ]
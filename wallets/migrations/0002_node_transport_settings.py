@@ -0,0 +1,43 @@
+# Generated by Django 5.1.15 on 2026-10-16 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallets", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="nodeconfiguration",
+            name="connect_timeout",
+            field=models.FloatField(
+                default=3.05, help_text="Seconds to wait for a TCP/TLS connection."
+            ),
+        ),
+        migrations.AddField(
+            model_name="nodeconfiguration",
+            name="max_retries",
+            field=models.PositiveSmallIntegerField(
+                default=2,
+                help_text="Retries for read-only RPC methods after connection errors or timeouts.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="nodeconfiguration",
+            name="pool_size",
+            field=models.PositiveSmallIntegerField(
+                default=10,
+                help_text="Keep-alive connections held open to this node per worker process.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="nodeconfiguration",
+            name="read_timeout",
+            field=models.FloatField(
+                default=15, help_text="Seconds to wait for an RPC response."
+            ),
+        ),
+    ]
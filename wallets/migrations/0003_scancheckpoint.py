@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-16 21:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallets", "0002_node_transport_settings"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScanCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "block_hash",
+                    models.CharField(
+                        blank=True,
+                        help_text="Empty means scan from the start.",
+                        max_length=128,
+                    ),
+                ),
+                ("transactions_scanned", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "currency",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scan_checkpoint",
+                        to="wallets.currency",
+                    ),
+                ),
+            ],
+        ),
+    ]
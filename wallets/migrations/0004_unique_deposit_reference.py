@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-16 21:04
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_deposits(apps, schema_editor):
+    WalletTransaction = apps.get_model("wallets", "WalletTransaction")
+    duplicates = list(
+        WalletTransaction.objects.filter(metadata__type="deposit")
+        .values("account_id", "reference", "direction")
+        .annotate(rows=Count("id"))
+        .filter(rows__gt=1)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Deposits credited more than once must be reconciled before adding the unique constraint: "
+            f"{duplicates}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallets", "0003_scancheckpoint"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_deposits, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="wallettransaction",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("metadata__type", "deposit")),
+                fields=("account", "reference", "direction"),
+                name="wallets_unique_deposit_reference",
+            ),
+        ),
+    ]
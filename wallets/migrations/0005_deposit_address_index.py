@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-16 21:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallets", "0004_unique_deposit_reference"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="depositaddress",
+            name="address",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+    ]
@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+from collections import defaultdict
+from dataclasses import dataclass, field
 from decimal import Decimal
+from typing import Iterable
 
 from django.conf import settings
 from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 
 
@@ -35,6 +39,16 @@ class NodeConfiguration(models.Model):
     rpc_username = models.CharField(max_length=128, blank=True)
     rpc_password = models.CharField(max_length=256, blank=True)
     headers = models.JSONField(default=dict, blank=True)
+    connect_timeout = models.FloatField(default=3.05, help_text="Seconds to wait for a TCP/TLS connection.")
+    read_timeout = models.FloatField(default=15, help_text="Seconds to wait for an RPC response.")
+    pool_size = models.PositiveSmallIntegerField(
+        default=10,
+        help_text="Keep-alive connections held open to this node per worker process.",
+    )
+    max_retries = models.PositiveSmallIntegerField(
+        default=2,
+        help_text="Retries for read-only RPC methods after connection errors or timeouts.",
+    )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -83,7 +97,7 @@ class DepositAddress(models.Model):
     """Deposit addresses bound to a wallet account."""
 
     account = models.ForeignKey(WalletAccount, on_delete=models.CASCADE, related_name="deposit_addresses")
-    address = models.CharField(max_length=256)
+    address = models.CharField(max_length=256, db_index=True)
     label = models.CharField(max_length=128, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -120,6 +134,14 @@ class WalletTransaction(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        constraints = [
+            # A node transaction is credited to an account at most once.
+            models.UniqueConstraint(
+                fields=["account", "reference", "direction"],
+                condition=models.Q(metadata__type="deposit"),
+                name="wallets_unique_deposit_reference",
+            ),
+        ]
 
     @classmethod
     def record(
@@ -160,6 +182,192 @@ class WalletTransaction(models.Model):
             )
         return tx
 
+    @classmethod
+    def ingest_deposits(cls, deposits: Iterable[tuple[int, str, Decimal]]) -> int:
+        """Credit ``(account_id, txid, amount)`` deposits, skipping txids already credited.
+
+        Amounts repeated for the same account and txid (several outputs of one
+        transaction) are summed into a single ledger row, so every output of a
+        transaction must be passed in the same call. Accounts are locked
+        in primary-key order, the new rows are written with one
+        ``bulk_create`` and each affected balance moves with one ``UPDATE``.
+        Returns the number of deposits credited, counting reorg-cancelled
+        ones that were confirmed again.
+        """
+
+        totals: dict[tuple[int, str], Decimal] = defaultdict(Decimal)
+        for account_id, txid, amount in deposits:
+            if amount > 0 and txid:
+                totals[(account_id, txid)] += amount
+        if not totals:
+            return 0
+
+        account_ids = sorted({account_id for account_id, _ in totals})
+        with transaction.atomic():
+            # Every credit path locks the account first, so nothing can insert
+            # these references between the lookup below and the insert.
+            list(WalletAccount.objects.select_for_update().filter(pk__in=account_ids).order_by("pk").values_list("pk"))
+            existing = {
+                (account_id, reference): (pk, status, amount)
+                for pk, account_id, reference, status, amount in cls.objects.filter(
+                    account_id__in=account_ids,
+                    reference__in={txid for _, txid in totals},
+                    direction=cls.Direction.CREDIT,
+                    metadata__type="deposit",
+                ).values_list("pk", "account_id", "reference", "status", "amount")
+                # The filter crosses every account with every txid; keep the reported pairs only.
+                if (account_id, reference) in totals
+            }
+            deltas: dict[int, Decimal] = defaultdict(Decimal)
+            # A deposit reversed by a reorg and mined again counts once more.
+            restored = []
+            for (account_id, _), (pk, status, amount) in existing.items():
+                if status == cls.Status.CANCELLED:
+                    restored.append(pk)
+                    deltas[account_id] += amount
+            if restored:
+                cls.objects.filter(pk__in=restored).update(status=cls.Status.CONFIRMED, updated_at=timezone.now())
+
+            rows = [
+                cls(
+                    account_id=account_id,
+                    amount=amount,
+                    direction=cls.Direction.CREDIT,
+                    status=cls.Status.CONFIRMED,
+                    reference=txid,
+                    metadata={"type": "deposit"},
+                )
+                for (account_id, txid), amount in totals.items()
+                if (account_id, txid) not in existing
+            ]
+            if rows:
+                # No ignore_conflicts: a conflict here means the lookup above
+                # missed a row, and crediting anyway would double-count it.
+                cls.objects.bulk_create(rows, batch_size=500)
+            for row in rows:
+                deltas[row.account_id] += row.amount
+            _apply_balance_deltas(deltas)
+        return len(rows) + len(restored)
+
+    @classmethod
+    def reverse_deposits(cls, currency_id: int, txids: Iterable[str]) -> int:
+        """Cancel confirmed deposits of ``txids`` that a reorg removed from the chain.
+
+        The amounts come back off the balances even if that leaves them
+        negative: the funds were never really received. Returns the number of
+        ledger rows cancelled.
+        """
+
+        txids = set(txids)
+        if not txids:
+            return 0
+        deposits = cls.objects.filter(
+            account__currency_id=currency_id,
+            reference__in=txids,
+            direction=cls.Direction.CREDIT,
+            status=cls.Status.CONFIRMED,
+            metadata__type="deposit",
+        )
+        with transaction.atomic():
+            account_ids = sorted(set(deposits.values_list("account_id", flat=True)))
+            list(WalletAccount.objects.select_for_update().filter(pk__in=account_ids).order_by("pk").values_list("pk"))
+            rows = list(deposits.values_list("pk", "account_id", "amount"))
+            if not rows:
+                return 0
+            cls.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(
+                status=cls.Status.CANCELLED, updated_at=timezone.now()
+            )
+            deltas: dict[int, Decimal] = defaultdict(Decimal)
+            for _, account_id, amount in rows:
+                deltas[account_id] -= amount
+            _apply_balance_deltas(deltas)
+        return len(rows)
+
+    @classmethod
+    def post_many(cls, entries: Iterable[LedgerEntry]) -> list["WalletTransaction"]:
+        """Post many ledger entries in one transaction; all of them or none.
+
+        Entries are checked in order against each account's running
+        available balance, exactly as consecutive ``record`` calls would be,
+        but the accounts are locked once in primary-key order, the rows are
+        written with one ``bulk_create`` and each balance moves with one
+        ``UPDATE`` of its net change.
+        """
+
+        entries = list(entries)
+        if not entries:
+            return []
+        for entry in entries:
+            if entry.amount <= 0:
+                raise ValueError("Amount must be positive")
+            if entry.direction not in cls.Direction.values:
+                raise ValueError(f"Unknown direction {entry.direction!r}")
+
+        account_ids = sorted({entry.account.pk for entry in entries})
+        with transaction.atomic():
+            available = dict(
+                WalletAccount.objects.select_for_update()
+                .filter(pk__in=account_ids)
+                .order_by("pk")
+                .values_list("pk", "available_balance")
+            )
+            if len(available) != len(account_ids):
+                raise WalletAccount.DoesNotExist("Ledger entries reference a missing wallet account")
+            deltas: dict[int, Decimal] = defaultdict(Decimal)
+            for entry in entries:
+                account_id = entry.account.pk
+                if entry.direction == cls.Direction.DEBIT:
+                    if available[account_id] < entry.amount:
+                        raise ValueError(f"Insufficient available balance on account {account_id}")
+                    available[account_id] -= entry.amount
+                    deltas[account_id] -= entry.amount
+                else:
+                    available[account_id] += entry.amount
+                    deltas[account_id] += entry.amount
+
+            rows = cls.objects.bulk_create(
+                [
+                    cls(
+                        account_id=entry.account.pk,
+                        amount=entry.amount,
+                        direction=entry.direction,
+                        status=entry.status,
+                        reference=entry.reference,
+                        metadata=entry.metadata,
+                    )
+                    for entry in entries
+                ],
+                batch_size=500,
+            )
+            _apply_balance_deltas(deltas)
+        return rows
+
+
+def _apply_balance_deltas(deltas: dict[int, Decimal]) -> None:
+    """Move each account's balances by its net change; callers hold the row locks."""
+
+    now = timezone.now()
+    for account_id in sorted(deltas):
+        if not deltas[account_id]:
+            continue
+        WalletAccount.objects.filter(pk=account_id).update(
+            balance=F("balance") + deltas[account_id],
+            available_balance=F("available_balance") + deltas[account_id],
+            updated_at=now,
+        )
+
+
+@dataclass(frozen=True)
+class LedgerEntry:
+    """One movement for ``WalletTransaction.post_many``."""
+
+    account: WalletAccount
+    amount: Decimal
+    direction: str
+    reference: str = ""
+    metadata: dict = field(default_factory=dict)
+    status: str = WalletTransaction.Status.CONFIRMED
+
 
 class WalletBalanceSnapshot(models.Model):
     """Historical balance snapshots for analytics."""
@@ -172,3 +380,14 @@ class WalletBalanceSnapshot(models.Model):
     class Meta:
         ordering = ["-captured_at"]
 
+
+class ScanCheckpoint(models.Model):
+    """Last chain position whose deposits have been credited, per currency."""
+
+    currency = models.OneToOneField(Currency, on_delete=models.CASCADE, related_name="scan_checkpoint")
+    block_hash = models.CharField(max_length=128, blank=True, help_text="Empty means scan from the start.")
+    transactions_scanned = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:  # pragma: no cover - admin display
+        return f"Checkpoint<{self.currency.code}>"
@@ -0,0 +1,207 @@
+"""Deposit polling across currency nodes.
+
+Node calls for every active currency run concurrently on a thread pool, so
+total latency is bounded by the slowest node's deadline rather than the sum
+of all calls. Only network I/O happens on the worker threads. Results are
+credited on the calling thread once every node has answered or missed its
+deadline; results from a node that missed it are discarded and picked up
+again on the next run.
+
+Scanning is incremental: each currency's ``ScanCheckpoint`` holds the last
+block whose transactions were credited. A run fetches everything after it
+in one node response (``listsinceblock`` cannot page, so a long outage
+means a large response held in memory), credits it in slices of
+``SCAN_PAGE_SIZE`` to bound each statement and moves the checkpoint in the
+same database transaction, so a crash either credits a scan and records it
+or does neither. Deposits the node reports as removed by a reorg, and not
+mined again in the same scan, are cancelled and taken back off balances.
+Deposits are unique per account and txid, so rescanning blocks that were
+already credited is harmless.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+
+from django.db import transaction
+
+from .addresses import address_resolver
+from .models import Currency, NodeConfiguration, ScanCheckpoint, WalletTransaction
+from .services import CryptoNodeClient, NodeScan, get_node_client
+from .transport import RETRY_BACKOFF_CAP
+
+
+logger = logging.getLogger(__name__)
+
+SCAN_PAGE_SIZE = 500
+
+
+@dataclass
+class CurrencyPollReport:
+    currency: str
+    fetch_seconds: float = 0.0
+    credit_seconds: float = 0.0
+    transactions: int = 0
+    credited: int = 0
+    reorged: int = 0
+    error: str | None = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def node_deadline(node: NodeConfiguration) -> float:
+    """Worst case for one fetch: every attempt times out and backs off the maximum."""
+
+    attempts = node.max_retries + 1
+    return attempts * (node.connect_timeout + node.read_timeout) + node.max_retries * RETRY_BACKOFF_CAP
+
+
+def _fetch(client: CryptoNodeClient, cursor: str) -> tuple[NodeScan, float]:
+    started = time.perf_counter()
+    scan = client.scan_transactions(cursor)
+    return scan, time.perf_counter() - started
+
+
+def _txid(tx: dict) -> str | None:
+    return tx.get("txid") or tx.get("id")
+
+
+def credit_transactions(currency: Currency, transactions: list[dict]) -> int:
+    """Credit node transactions; txids already on the ledger are skipped.
+
+    Outputs are summed per account and txid over the whole list before it is
+    split into ``SCAN_PAGE_SIZE`` slices, so the outputs of one transaction
+    always reach the ledger together.
+    """
+
+    totals: dict[tuple[int, str], Decimal] = defaultdict(Decimal)
+    for start in range(0, len(transactions), SCAN_PAGE_SIZE):
+        receipts = []
+        for tx in transactions[start : start + SCAN_PAGE_SIZE]:
+            if tx.get("category") not in {"receive"}:
+                continue
+            address = tx.get("address")
+            amount = Decimal(str(tx.get("amount", 0)))
+            txid = _txid(tx)
+            if not address or not txid or amount <= 0:
+                continue
+            receipts.append((address, txid, amount))
+
+        owners = address_resolver.resolve(currency.pk, [address for address, _, _ in receipts])
+        for address, txid, amount in receipts:
+            for account_id in owners[address]:
+                totals[(account_id, txid)] += amount
+
+    deposits = [(account_id, txid, amount) for (account_id, txid), amount in totals.items()]
+    credited = 0
+    for start in range(0, len(deposits), SCAN_PAGE_SIZE):
+        credited += WalletTransaction.ingest_deposits(deposits[start : start + SCAN_PAGE_SIZE])
+    return credited
+
+
+def apply_scan(currency: Currency, cursor: str, scan: NodeScan) -> tuple[int, int] | None:
+    """Credit a scan, reverse reorged deposits and advance the checkpoint atomically.
+
+    Returns ``(credited, reversed)``, or ``None`` without touching the ledger
+    when another poll already moved the checkpoint past ``cursor``.
+    """
+
+    with transaction.atomic():
+        checkpoint, _ = ScanCheckpoint.objects.select_for_update().get_or_create(currency=currency)
+        if checkpoint.block_hash != cursor:
+            return None
+
+        remined = {_txid(tx) for tx in scan.transactions}
+        orphaned = {
+            _txid(tx) for tx in scan.removed if tx.get("category") == "receive" and _txid(tx) not in remined
+        }
+        reversed_count = WalletTransaction.reverse_deposits(currency.pk, orphaned - {None})
+        if reversed_count:
+            logger.warning("%s: cancelled %s deposits removed by a reorg", currency.code, reversed_count)
+
+        credited = credit_transactions(currency, scan.transactions)
+
+        checkpoint.block_hash = scan.next_cursor
+        checkpoint.transactions_scanned += len(scan.transactions)
+        checkpoint.save(update_fields=["block_hash", "transactions_scanned", "updated_at"])
+    return credited, reversed_count
+
+
+def poll_all_currencies(max_workers: int | None = None) -> list[CurrencyPollReport]:
+    currencies = list(Currency.objects.filter(is_active=True).select_related("node"))
+    currencies_by_code = {currency.code: currency for currency in currencies}
+    reports = {code: CurrencyPollReport(code) for code in currencies_by_code}
+
+    cursors = dict(ScanCheckpoint.objects.values_list("currency__code", "block_hash"))
+    clients: dict[str, CryptoNodeClient] = {}
+    for currency in currencies:
+        try:
+            clients[currency.code] = get_node_client(currency)
+        except Exception as exc:
+            reports[currency.code].error = str(exc)
+    if not clients:
+        return list(reports.values())
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(clients), thread_name_prefix="wallet-poll")
+    started = time.monotonic()
+    futures = {code: executor.submit(_fetch, client, cursors.get(code, "")) for code, client in clients.items()}
+    fetched: dict[str, NodeScan] = {}
+    try:
+        # Gather every fetch before crediting anything, so database time spent
+        # on one currency never counts against another node's deadline.
+        for code, future in sorted(futures.items(), key=lambda item: node_deadline(clients[item[0]].node)):
+            report = reports[code]
+            remaining = node_deadline(clients[code].node) - (time.monotonic() - started)
+            try:
+                scan, report.fetch_seconds = future.result(timeout=max(0.0, remaining))
+            except FutureTimeoutError:
+                report.fetch_seconds = time.monotonic() - started
+                report.error = "deadline exceeded"
+            except Exception as exc:
+                report.fetch_seconds = time.monotonic() - started
+                report.error = str(exc) or exc.__class__.__name__
+            else:
+                fetched[code] = scan
+    finally:
+        # Stragglers finish in the background; their results are ignored.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for code, scan in fetched.items():
+        report = reports[code]
+        report.transactions = len(scan.transactions)
+        credit_started = time.perf_counter()
+        try:
+            applied = apply_scan(currencies_by_code[code], cursors.get(code, ""), scan)
+        except Exception as exc:
+            logger.exception("Crediting %s deposits failed", code)
+            report.error = str(exc) or exc.__class__.__name__
+        else:
+            if applied is None:
+                report.error = "checkpoint moved by a concurrent poll"
+            else:
+                report.credited, report.reorged = applied
+        report.credit_seconds = time.perf_counter() - credit_started
+
+    for report in reports.values():
+        if report.error:
+            logger.warning(
+                "Polling %s failed after %.2fs: %s", report.currency, report.fetch_seconds, report.error
+            )
+        else:
+            logger.info(
+                "Polled %s: %s transactions in %.2fs, %s credited and %s reorged in %.2fs",
+                report.currency,
+                report.transactions,
+                report.fetch_seconds,
+                report.credited,
+                report.reorged,
+                report.credit_seconds,
+            )
+    return list(reports.values())
@@ -3,15 +3,20 @@
 from __future__ import annotations
 
 import abc
+import itertools
 import logging
-from dataclasses import dataclass
+from collections import defaultdict
+from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import Iterable
+from typing import Any, Iterable, Sequence
 
 import requests
+from django.db.models import Sum
 from django.utils import timezone
 
+from .addresses import invalidate_deposit_addresses
 from .models import Currency, DepositAddress, NodeConfiguration, WalletAccount, WalletTransaction
+from .transport import RETRYABLE_STATUS_CODES, RetryableResponse, call_with_retries, node_sessions
 
 
 logger = logging.getLogger(__name__)
@@ -21,6 +26,32 @@ class NodeClientError(RuntimeError):
     pass
 
 
+@dataclass(frozen=True)
+class RpcCall:
+    method: str
+    params: list = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class RpcResult:
+    call: RpcCall
+    result: Any = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class NodeScan:
+    """Transactions since a cursor, plus those a reorg took back out of the chain."""
+
+    transactions: list[dict]
+    next_cursor: str
+    removed: list[dict] = field(default_factory=list)
+
+
 class CryptoNodeClient(abc.ABC):
     """Abstract node client interface."""
 
@@ -39,38 +70,178 @@ class CryptoNodeClient(abc.ABC):
     def list_transactions(self) -> Iterable[dict]:
         raise NotImplementedError
 
+    def scan_transactions(self, cursor: str) -> NodeScan:
+        """Transactions after ``cursor`` and the cursor to resume from next time.
+
+        Clients without an incremental API return their recent history and
+        leave the cursor unchanged.
+        """
+
+        return NodeScan(list(self.list_transactions()), cursor)
+
+    def generate_addresses(self, accounts: Sequence[WalletAccount]) -> list[str | None]:
+        """One new address per account, ``None`` where the node refused."""
+
+        addresses: list[str | None] = []
+        for account in accounts:
+            try:
+                addresses.append(self.generate_address(account))
+            except NodeClientError:
+                logger.exception("Address generation failed for account %s", account.pk)
+                addresses.append(None)
+        return addresses
+
+    def get_received_amounts(self, addresses: Sequence[str]) -> dict[str, Decimal]:
+        """Total ever received per address; addresses the node cannot report are omitted."""
+
+        return {}
+
 
 class JsonRpcClient(CryptoNodeClient):
     """Generic JSON-RPC client for BTC-like nodes."""
 
+    # Read-only calls that are safe to repeat after a timeout or dropped connection.
+    IDEMPOTENT_METHODS = frozenset(
+        {
+            "getbalance",
+            "getblockchaininfo",
+            "getblockcount",
+            "getblockhash",
+            "getaddressinfo",
+            "getreceivedbyaddress",
+            "gettransaction",
+            "listsinceblock",
+            "listtransactions",
+            "validateaddress",
+        }
+    )
+
+    BATCH_SIZE = 100
+    LIST_TRANSACTIONS_PAGE = 100
+    LIST_TRANSACTIONS_PAGES = 5
+
+    def __init__(self, node: NodeConfiguration):
+        super().__init__(node)
+        self._ids = itertools.count(1)
+
     def _post(self, method: str, params: list | None = None) -> dict:
-        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params or []}
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params or []}
+        retries = self.node.max_retries if method in self.IDEMPOTENT_METHODS else 0
+        try:
+            data = call_with_retries(lambda: self._send(payload), retries)
+        except (requests.RequestException, RetryableResponse) as exc:
+            raise NodeClientError(f"{method} failed: {exc}") from exc
+        if "error" in data and data["error"]:
+            raise NodeClientError(str(data["error"]))
+        return data["result"]
+
+    def batch(self, calls: Sequence[RpcCall]) -> list[RpcResult]:
+        """Send ``calls`` as JSON-RPC batches, returning results in call order.
+
+        Responses are matched by id, so a failing call only fails its own
+        result. A transport failure fails every call in the affected chunk.
+        """
+
+        results: list[RpcResult] = []
+        for start in range(0, len(calls), self.BATCH_SIZE):
+            chunk = calls[start : start + self.BATCH_SIZE]
+            ids = [next(self._ids) for _ in chunk]
+            payload = [
+                {"jsonrpc": "2.0", "id": call_id, "method": call.method, "params": call.params}
+                for call_id, call in zip(ids, chunk)
+            ]
+            retryable = all(call.method in self.IDEMPOTENT_METHODS for call in chunk)
+            try:
+                data = call_with_retries(lambda: self._send(payload), self.node.max_retries if retryable else 0)
+            except (requests.RequestException, RetryableResponse) as exc:
+                results.extend(RpcResult(call, error=f"transport: {exc}") for call in chunk)
+                continue
+
+            if not isinstance(data, list):
+                # Nodes without batch support answer with a single error object.
+                error = str((data or {}).get("error") or "batch not supported")
+                results.extend(RpcResult(call, error=error) for call in chunk)
+                continue
+
+            by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+            for call_id, call in zip(ids, chunk):
+                item = by_id.get(call_id)
+                if item is None:
+                    results.append(RpcResult(call, error="no response"))
+                elif item.get("error"):
+                    results.append(RpcResult(call, error=str(item["error"])))
+                else:
+                    results.append(RpcResult(call, result=item.get("result")))
+        return results
+
+    def _send(self, payload: dict | list):
         auth = None
         if self.node.rpc_username:
             auth = (self.node.rpc_username, self.node.rpc_password)
 
-        response = requests.post(
+        response = node_sessions.get(self.node).post(
             self.node.rpc_url,
             json=payload,
             headers=self.node.headers or {},
             auth=auth,
-            timeout=15,
+            timeout=(self.node.connect_timeout, self.node.read_timeout),
         )
-        response.raise_for_status()
-        data = response.json()
-        if "error" in data and data["error"]:
-            raise NodeClientError(str(data["error"]))
-        return data["result"]
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            raise RetryableResponse(response)
+        try:
+            # bitcoind reports RPC errors as HTTP 500 with a JSON body.
+            return response.json()
+        except ValueError:
+            response.raise_for_status()
+            raise
 
     def generate_address(self, account: WalletAccount) -> str:
         label = f"user_{account.user_id}"
         return self._post("getnewaddress", [label])
 
+    def generate_addresses(self, accounts: Sequence[WalletAccount]) -> list[str | None]:
+        results = self.batch([RpcCall("getnewaddress", [f"user_{account.user_id}"]) for account in accounts])
+        for account, result in zip(accounts, results):
+            if not result.ok:
+                logger.warning("Address generation failed for account %s: %s", account.pk, result.error)
+        return [result.result if result.ok else None for result in results]
+
     def get_balance(self) -> Decimal:
         return Decimal(str(self._post("getbalance")))
 
+    def get_received_amounts(self, addresses: Sequence[str]) -> dict[str, Decimal]:
+        results = self.batch([RpcCall("getreceivedbyaddress", [address]) for address in addresses])
+        return {
+            address: Decimal(str(result.result))
+            for address, result in zip(addresses, results)
+            if result.ok and result.result is not None
+        }
+
+    def scan_transactions(self, cursor: str) -> NodeScan:
+        # listsinceblock cannot page: the whole answer arrives in one response.
+        data = self._post("listsinceblock", [cursor] if cursor else [])
+        removed = data.get("removed") or []
+        if removed:
+            logger.warning(
+                "%s: %s transactions since %s were removed by a reorg",
+                self.node.currency.code,
+                len(removed),
+                cursor or "genesis",
+            )
+        return NodeScan(data.get("transactions") or [], data["lastblock"], removed)
+
     def list_transactions(self) -> Iterable[dict]:
-        return self._post("listtransactions", ["*", 100])
+        # Several pages in one round trip, so bursts beyond a single page are not missed.
+        page = self.LIST_TRANSACTIONS_PAGE
+        results = self.batch(
+            [RpcCall("listtransactions", ["*", page, skip * page]) for skip in range(self.LIST_TRANSACTIONS_PAGES)]
+        )
+        transactions: list[dict] = []
+        for result in results:
+            if not result.ok:
+                raise NodeClientError(result.error)
+            transactions.extend(result.result or [])
+        return transactions
 
 
 class PlaceholderNodeClient(CryptoNodeClient):
@@ -117,8 +288,76 @@ class WalletService:
         )
         return deposit_address
 
+    def pregenerate_deposit_addresses(self, currency: Currency, limit: int = 500) -> int:
+        """Give accounts without an active deposit address one, using a single node batch."""
+
+        accounts = list(
+            WalletAccount.objects.filter(currency=currency)
+            .exclude(deposit_addresses__is_active=True)
+            .order_by("pk")[:limit]
+        )
+        if not accounts:
+            return 0
+
+        addresses = get_node_client(currency).generate_addresses(accounts)
+        rows = [
+            DepositAddress(account=account, address=address, label=f"{currency.code} deposit")
+            for account, address in zip(accounts, addresses)
+            if address
+        ]
+        if not rows:
+            return 0
+        # bulk_create returns skipped conflicts too, so count what actually landed.
+        stored = DepositAddress.objects.filter(account__in=accounts, address__in=[row.address for row in rows])
+        before = stored.count()
+        DepositAddress.objects.bulk_create(rows, ignore_conflicts=True)
+        created = stored.count() - before
+        if created:
+            # bulk_create sends no post_save, so the resolver is told directly.
+            invalidate_deposit_addresses()
+        return created
+
+    def find_uncredited_deposits(self, currency: Currency) -> dict[int, Decimal]:
+        """Accounts whose addresses received more on-chain than was credited, with the shortfall."""
+
+        address_accounts = dict(
+            DepositAddress.objects.filter(account__currency=currency).values_list("address", "account_id")
+        )
+        received = get_node_client(currency).get_received_amounts(list(address_accounts))
+
+        received_by_account: dict[int, Decimal] = defaultdict(Decimal)
+        for address, amount in received.items():
+            received_by_account[address_accounts[address]] += amount
+
+        credited = dict(
+            WalletTransaction.objects.filter(
+                account_id__in=list(received_by_account),
+                direction=WalletTransaction.Direction.CREDIT,
+                status=WalletTransaction.Status.CONFIRMED,
+                metadata__type="deposit",
+            )
+            .values("account_id")
+            .annotate(total=Sum("amount"))
+            .values_list("account_id", "total")
+        )
+        return {
+            account_id: amount - credited.get(account_id, Decimal("0"))
+            for account_id, amount in received_by_account.items()
+            if amount > credited.get(account_id, Decimal("0"))
+        }
+
     def record_deposit(self, account: WalletAccount, amount: Decimal, txid: str) -> WalletTransaction:
-        return account.credit(amount, reference=txid, metadata={"type": "deposit"})
+        """Credit a deposit once; repeating a txid returns the existing ledger row."""
+
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+        WalletTransaction.ingest_deposits([(account.pk, txid, amount)])
+        return WalletTransaction.objects.get(
+            account=account,
+            reference=txid,
+            direction=WalletTransaction.Direction.CREDIT,
+            metadata__type="deposit",
+        )
 
     def request_withdrawal(self, account: WalletAccount, amount: Decimal, target_address: str) -> WalletTransaction:
         tx = account.debit(amount, reference=f"withdrawal:{target_address}", metadata={"type": "withdrawal"})
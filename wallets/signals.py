@@ -0,0 +1,14 @@
+"""Signals for wallets."""
+
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .addresses import invalidate_deposit_addresses
+from .models import DepositAddress
+
+
+@receiver([post_save, post_delete], sender=DepositAddress)
+def invalidate_address_owners(sender, instance, **kwargs):  # pragma: no cover - signal
+    invalidate_deposit_addresses()
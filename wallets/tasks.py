@@ -2,31 +2,44 @@
 
 from __future__ import annotations
 
-from decimal import Decimal
+import logging
 
 from celery import shared_task
 
-from .models import Currency, WalletAccount
-from .services import WalletService, get_node_client
+from .models import Currency
+from .polling import poll_all_currencies
+from .services import NodeClientError, WalletService
+
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task(name="wallets.poll_transactions")
 def poll_transactions():  # pragma: no cover - scheduled task
-    for currency in Currency.objects.filter(is_active=True):
-        try:
-            client = get_node_client(currency)
-        except Exception:
-            continue
+    return [report.as_dict() for report in poll_all_currencies()]
 
-        for tx in client.list_transactions():
-            if tx.get("category") not in {"receive"}:
-                continue
-            address = tx.get("address")
-            amount = Decimal(str(tx.get("amount", 0)))
-            txid = tx.get("txid") or tx.get("id")
-            if not address or not txid or amount <= 0:
-                continue
 
-            for account in WalletAccount.objects.filter(deposit_addresses__address=address).distinct():
-                WalletService().record_deposit(account, amount, txid)
+@shared_task(name="wallets.pregenerate_deposit_addresses")
+def pregenerate_deposit_addresses():  # pragma: no cover - scheduled task
+    created = {}
+    for currency in Currency.objects.filter(is_active=True, node__is_active=True):
+        try:
+            created[currency.code] = WalletService().pregenerate_deposit_addresses(currency)
+        except NodeClientError:
+            logger.exception("Address pre-generation failed for %s", currency.code)
+    return created
+
 
+@shared_task(name="wallets.check_deposit_balances")
+def check_deposit_balances():  # pragma: no cover - scheduled task
+    shortfalls = {}
+    for currency in Currency.objects.filter(is_active=True, node__is_active=True):
+        try:
+            uncredited = WalletService().find_uncredited_deposits(currency)
+        except NodeClientError:
+            logger.exception("Deposit balance check failed for %s", currency.code)
+            continue
+        for account_id, amount in uncredited.items():
+            logger.warning("Account %s has %s %s received but not credited", account_id, amount, currency.code)
+        shortfalls[currency.code] = {str(account_id): str(amount) for account_id, amount in uncredited.items()}
+    return shortfalls
@@ -0,0 +1,95 @@
+"""Pooled HTTP transport for node RPC.
+
+Each worker process keeps one ``requests.Session`` per node with a
+keep-alive connection pool sized from ``NodeConfiguration.pool_size``, so
+consecutive RPCs reuse TCP/TLS connections instead of handshaking every
+call. Sessions are rebuilt when the node's configuration changes and after
+a fork, since pooled sockets must not be shared between processes.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from typing import Callable, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .models import NodeConfiguration
+
+
+T = TypeVar("T")
+
+RETRY_BACKOFF_BASE = 0.2
+RETRY_BACKOFF_CAP = 2.0
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+
+
+class RetryableResponse(Exception):
+    """Raised for gateway errors that are worth retrying."""
+
+    def __init__(self, response: requests.Response):
+        super().__init__(f"{response.status_code} from {response.url}")
+        self.response = response
+
+
+class NodeSessionPool:
+    """Per-process registry of pooled sessions keyed by node."""
+
+    def __init__(self):
+        self._sessions: dict[int, tuple[tuple, requests.Session]] = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def get(self, node: NodeConfiguration) -> requests.Session:
+        signature = (node.rpc_url, node.pool_size, node.updated_at)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Inherited sockets belong to the parent; drop them without closing.
+                self._sessions = {}
+                self._pid = os.getpid()
+
+            entry = self._sessions.get(node.pk)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+            if entry is not None:
+                entry[1].close()
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, node.pool_size), pool_block=True)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._sessions[node.pk] = (signature, session)
+            return session
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+node_sessions = NodeSessionPool()
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+
+    return random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2**attempt))
+
+
+def call_with_retries(func: Callable[[], T], retries: int, sleep: Callable[[float], None] = time.sleep) -> T:
+    """Run ``func``, retrying connection failures, timeouts and gateway errors."""
+
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except (requests.ConnectionError, requests.Timeout, RetryableResponse):
+            if attempt >= retries:
+                raise
+            sleep(backoff_delay(attempt))
+            attempt += 1